@@ -8,9 +8,32 @@ import os
 import sys
 import subprocess
 import shutil
-from typing import Optional, List, Tuple
+import heapq
+import hashlib
+import json
+import re
+import shlex
+import sqlite3
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from typing import Optional, List, Tuple, Dict, Set, Iterator
 from pathlib import Path
 
+try:
+    import xxhash  # optional: faster quick-reject pass in the duplicate finder
+except ImportError:
+    xxhash = None
+
+HOME = os.path.expanduser("~")
+CACHE_DIR = os.path.join(HOME, ".cache")
+HASH_CACHE_DB = os.path.join(CACHE_DIR, "storage_manager", "scan.db")
+
+# clean + autoclean + autoremove under a single sudo (one PAM round trip)
+APT_CLEANUP_ARGV = ["sudo", "sh", "-c", "apt-get clean && apt-get autoclean && apt-get autoremove -y"]
+
 # ANSI color codes
 class Colors:
     HEADER = '\033[95m'
@@ -45,6 +68,117 @@ def print_info(text: str):
     """Print info message"""
     print(f"{Colors.CYAN}ℹ {text}{Colors.ENDC}")
 
+# Menu bodies never change, so build them once and emit each with a single write
+_MAIN_MENU = "\n".join([
+    f"\n{Colors.BOLD}Main Menu:{Colors.ENDC}",
+    f"{Colors.CYAN}1.{Colors.ENDC} Storage Visualization",
+    f"{Colors.CYAN}2.{Colors.ENDC} System Cleanup (Safe)",
+    f"{Colors.CYAN}3.{Colors.ENDC} Docker Management",
+    f"{Colors.CYAN}4.{Colors.ENDC} Advanced Analysis",
+    f"{Colors.CYAN}5.{Colors.ENDC} Check & Install Tools",
+    f"{Colors.CYAN}6.{Colors.ENDC} WSL Disk Compaction Info",
+    f"{Colors.RED}0.{Colors.ENDC} Exit",
+]) + "\n"
+
+_VISUALIZATION_MENU = "\n".join([
+    f"{Colors.BOLD}Visualization Options:{Colors.ENDC}",
+    f"{Colors.CYAN}1.{Colors.ENDC} Interactive disk usage (ncdu) - RECOMMENDED",
+    f"{Colors.CYAN}2.{Colors.ENDC} Quick directory size overview (du)",
+    f"{Colors.CYAN}3.{Colors.ENDC} Filesystem overview (df)",
+    f"{Colors.CYAN}4.{Colors.ENDC} Modern disk usage (dust)",
+    f"{Colors.CYAN}5.{Colors.ENDC} Modern filesystem overview (duf)",
+    f"{Colors.CYAN}6.{Colors.ENDC} Top 20 largest directories",
+    f"{Colors.CYAN}7.{Colors.ENDC} Common space hogs quick check",
+    f"{Colors.RED}0.{Colors.ENDC} Back to main menu",
+]) + "\n"
+
+_CLEANUP_MENU = "\n".join([
+    f"{Colors.BOLD}Cleanup Options:{Colors.ENDC}",
+    f"{Colors.CYAN}1.{Colors.ENDC} Clean APT package cache",
+    f"{Colors.CYAN}2.{Colors.ENDC} Clean old journal logs",
+    f"{Colors.CYAN}3.{Colors.ENDC} Clean temporary files",
+    f"{Colors.CYAN}4.{Colors.ENDC} Clean user caches",
+    f"{Colors.CYAN}5.{Colors.ENDC} Clean thumbnail cache",
+    f"{Colors.CYAN}6.{Colors.ENDC} Clean npm cache (if installed)",
+    f"{Colors.CYAN}7.{Colors.ENDC} Clean pip cache (if installed)",
+    f"{Colors.CYAN}8.{Colors.ENDC} Run ALL safe cleanups",
+    f"{Colors.RED}0.{Colors.ENDC} Back to main menu",
+]) + "\n"
+
+_DOCKER_MENU = "\n".join([
+    f"\n{Colors.BOLD}Docker Management Options:{Colors.ENDC}",
+    f"{Colors.CYAN}1.{Colors.ENDC} Show Docker storage details",
+    f"{Colors.CYAN}2.{Colors.ENDC} List all containers (running & stopped)",
+    f"{Colors.CYAN}3.{Colors.ENDC} List all images",
+    f"{Colors.CYAN}4.{Colors.ENDC} List all volumes",
+    f"{Colors.CYAN}5.{Colors.ENDC} Remove stopped containers (SAFE)",
+    f"{Colors.CYAN}6.{Colors.ENDC} Remove dangling images (SAFE)",
+    f"{Colors.CYAN}7.{Colors.ENDC} Remove unused networks (SAFE)",
+    f"{Colors.CYAN}8.{Colors.ENDC} Remove build cache (SAFE)",
+    f"{Colors.YELLOW}9.{Colors.ENDC} Remove ALL unused images (removes images not in use)",
+    f"{Colors.RED}10.{Colors.ENDC} Remove unused volumes (DANGEROUS - may lose data!)",
+    f"{Colors.CYAN}11.{Colors.ENDC} Safe Docker cleanup (containers + dangling images + build cache)",
+    f"{Colors.RED}0.{Colors.ENDC} Back to main menu",
+]) + "\n"
+
+_ANALYSIS_MENU = "\n".join([
+    f"{Colors.BOLD}Advanced Options:{Colors.ENDC}",
+    f"{Colors.CYAN}1.{Colors.ENDC} Find largest files in system",
+    f"{Colors.CYAN}2.{Colors.ENDC} Find largest directories in specific path",
+    f"{Colors.CYAN}3.{Colors.ENDC} Find old files (not accessed in N days)",
+    f"{Colors.CYAN}4.{Colors.ENDC} Search for specific file types and their total size",
+    f"{Colors.CYAN}5.{Colors.ENDC} Check for duplicate files (by size and content)",
+    f"{Colors.CYAN}6.{Colors.ENDC} Analyze directory growth over time",
+    f"{Colors.RED}0.{Colors.ENDC} Back to main menu",
+]) + "\n"
+
+_INSTALL_MENU = "\n".join([
+    f"\n{Colors.BOLD}Installation Options:{Colors.ENDC}",
+    f"{Colors.CYAN}1.{Colors.ENDC} Install ncdu (recommended)",
+    f"{Colors.CYAN}2.{Colors.ENDC} Install duf",
+    f"{Colors.CYAN}3.{Colors.ENDC} Install dust (via snap)",
+    f"{Colors.CYAN}4.{Colors.ENDC} Install all recommended tools",
+    f"{Colors.RED}0.{Colors.ENDC} Back to main menu",
+]) + "\n"
+
+_WSL_COMPACTION_INFO = "\n".join([
+    f"{Colors.BOLD}Why Compaction is Needed:{Colors.ENDC}",
+    "WSL uses virtual disk files (VHDX) that grow as you use space but don't",
+    "automatically shrink when you delete files. After cleanup, you must compact",
+    "the VHDX to reclaim the space on Windows.\n",
+    f"{Colors.BOLD}Steps to Compact WSL Disks (Run in Windows PowerShell as Admin):{Colors.ENDC}\n",
+    f"{Colors.YELLOW}Method 1 - Modern WSL (WSL 2.0+):{Colors.ENDC}",
+    "1. Shutdown all WSL instances:",
+    "   wsl --shutdown\n",
+    "2. Compact Ubuntu-22.04 disk:",
+    "   wsl --manage Ubuntu-22.04 --set-sparse true\n",
+    "3. Compact docker-desktop-data (if using Docker):",
+    "   wsl --manage docker-desktop-data --set-sparse true\n",
+    f"{Colors.YELLOW}Method 2 - Diskpart (if Method 1 doesn't work):{Colors.ENDC}",
+    "1. Shutdown WSL:",
+    "   wsl --shutdown\n",
+    "2. Open diskpart:",
+    "   diskpart\n",
+    "3. In diskpart, for Ubuntu:",
+    '   select vdisk file="%LOCALAPPDATA%\\Packages\\CanonicalGroupLimited.Ubuntu22.04LTS_79rhkp1fndgsc\\LocalState\\ext4.vhdx"',
+    "   compact vdisk",
+    "   detach vdisk\n",
+    "4. For Docker:",
+    '   select vdisk file="%LOCALAPPDATA%\\Docker\\wsl\\data\\ext4.vhdx"',
+    "   compact vdisk",
+    "   detach vdisk\n",
+    "5. Exit diskpart:",
+    "   exit\n",
+    f"{Colors.YELLOW}Method 3 - Optimize-VHD (requires Hyper-V):{Colors.ENDC}",
+    'optimize-vhd -Path "$env:LOCALAPPDATA\\Packages\\CanonicalGroupLimited.Ubuntu22.04LTS_79rhkp1fndgsc\\LocalState\\ext4.vhdx" -Mode Full\n',
+    f"{Colors.BOLD}Important Notes:{Colors.ENDC}",
+    "• Always run 'wsl --shutdown' before compacting",
+    "• Compaction can take several minutes",
+    "• Make sure no WSL instances are running",
+    "• The VHDX file paths may vary based on your installation",
+    "• Backup important data before compacting",
+]) + "\n"
+
 def run_command(cmd: str, shell: bool = True, capture: bool = False) -> Tuple[int, str]:
     """
     Run a shell command and return exit code and output
@@ -65,32 +199,1066 @@ def run_command(cmd: str, shell: bool = True, capture: bool = False) -> Tuple[in
     except Exception as e:
         return 1, str(e)
 
+def run_argv(argv: List[str], capture: bool = False) -> Tuple[int, str]:
+    """
+    Run a command given as an argument list (no shell) and return exit code and output
+    """
+    try:
+        if capture:
+            result = subprocess.run(
+                argv,
+                capture_output=True,
+                text=True,
+                check=False
+            )
+            return result.returncode, result.stdout + result.stderr
+        else:
+            result = subprocess.run(argv, check=False)
+            return result.returncode, ""
+    except Exception as e:
+        return 1, str(e)
+
+def _find_argv(path: str, *predicates: str, sudo: bool = False, skip_pseudo: bool = False) -> List[str]:
+    """
+    Build a find argument list for path (run without a shell). A path starting
+    with "-" is spelled "./-..." so find can't take it for an expression.
+    With skip_pseudo, /proc, /sys and other kernel mounts below path are pruned.
+    """
+    if path.startswith("-"):
+        path = os.path.join(".", path)
+    prune: List[str] = []
+    if skip_pseudo:
+        pruned: List[str] = []
+        for mount_point in sorted(_pseudo_mounts_below(path)):
+            # Mounts nested in an already pruned one (e.g. /sys/fs/cgroup) are never reached
+            if any(mount_point.startswith(parent.rstrip("/") + "/") for parent in pruned):
+                continue
+            pruned.append(mount_point)
+            # -path takes a glob pattern, so escape any glob characters in the mount point
+            pattern = re.sub(r"([*?\[\\])", r"\\\1", mount_point)
+            prune += ["-o", "-path", pattern] if prune else ["-path", pattern]
+    if prune:
+        predicates = ("(", *prune, ")", "-prune", "-o", *predicates)
+    return (["sudo"] if sudo else []) + ["find", path, *predicates]
+
+def _parse_size_line(line: str) -> Optional[Tuple[int, str]]:
+    """Parse a "<bytes>\t<path>" line as printed by du -B1"""
+    size_str, sep, path = line.rstrip("\n").partition("\t")
+    if not sep or not size_str.isdigit():
+        return None
+    return int(size_str), path
+
+def _push_top(heap: List[Tuple[int, str]], count: int, item: Tuple[int, str]):
+    """Push item into a min-heap that keeps only the count largest items"""
+    if len(heap) < count:
+        heapq.heappush(heap, item)
+    elif item[0] > heap[0][0]:
+        heapq.heapreplace(heap, item)
+
+def stream_top_entries(argv: List[str], count: int) -> List[Tuple[int, str]]:
+    """
+    Run a command printing "<bytes>\t<path>" lines (e.g. du -B1) and keep only
+    the largest entries, instead of piping everything through sort | head
+    """
+    heap: List[Tuple[int, str]] = []
+    try:
+        process = subprocess.Popen(
+            argv,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors='replace'
+        )
+    except Exception:
+        return heap
+
+    with process:
+        try:
+            for line in process.stdout:
+                item = _parse_size_line(line)
+                if item:
+                    _push_top(heap, count, item)
+        except KeyboardInterrupt:
+            # Don't leave an orphaned du walking the disk
+            process.terminate()
+            raise
+
+    return sorted(heap, reverse=True)
+
+@lru_cache(maxsize=None)
 def check_tool_installed(tool: str) -> bool:
-    """Check if a command-line tool is installed"""
+    """Check if a command-line tool is installed (cached per process)"""
     return shutil.which(tool) is not None
 
+@lru_cache(maxsize=None)
 def check_sudo() -> bool:
     """Check if user has sudo privileges"""
-    code, _ = run_command("sudo -n true 2>/dev/null", capture=True)
+    # Already root (common in WSL/containers): no need to fork sudo at all
+    if os.geteuid() == 0:
+        return True
+    code, _ = run_argv(["sudo", "-n", "true"], capture=True)
     return code == 0
 
-def get_disk_usage() -> str:
-    """Get disk usage summary"""
-    code, output = run_command("df -h /", capture=True)
-    return output if code == 0 else "Unable to get disk usage"
+def get_disk_usage(path: str = "/") -> str:
+    """Get disk usage summary (df -h style) straight from statvfs"""
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return "Unable to get disk usage"
+
+    total = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    avail = st.f_bavail * st.f_frsize
+    # df reports Use% against the space available to unprivileged users
+    usable = used + avail
+    percent = -(-used * 100 // usable) if usable else 0
+
+    return (
+        f"{'Size':>8} {'Used':>8} {'Avail':>8} {'Use%':>5}  Mounted on\n"
+        f"{format_size(total):>8} {format_size(used):>8} {format_size(avail):>8} {percent:>4}%  {path}"
+    )
+
+# Kernel/virtual filesystems that df hides and that never hold user data
+_PSEUDO_FILESYSTEMS = frozenset({
+    "proc", "sysfs", "cgroup", "cgroup2", "devpts", "mqueue", "debugfs", "tracefs",
+    "securityfs", "pstore", "bpf", "autofs", "configfs", "fusectl", "hugetlbfs",
+    "binfmt_misc", "nsfs", "rpc_pipefs", "selinuxfs", "efivarfs",
+})
+
+def _unescape_mount_field(value: str) -> str:
+    """Decode the octal escapes (e.g. \\040 for space) used in mountinfo"""
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), value)
+
+def read_mounts() -> List[Tuple[str, str, str]]:
+    """Return (source, fstype, mount point) for each mount in /proc/self/mountinfo"""
+    mounts: List[Tuple[str, str, str]] = []
+    try:
+        with open("/proc/self/mountinfo") as f:
+            for line in f:
+                # "<id> <parent> <major:minor> <root> <mount point> <opts> ... - <fstype> <source> <opts>"
+                left, sep, right = line.partition(" - ")
+                fields = left.split()
+                tail = right.split()
+                if not sep or len(fields) < 5 or len(tail) < 2:
+                    continue
+                mounts.append((_unescape_mount_field(tail[1]), tail[0], _unescape_mount_field(fields[4])))
+    except OSError:
+        pass
+    return mounts
+
+def filesystem_tables() -> Optional[Tuple[str, str]]:
+    """
+    Build df -h and df -i style tables from one pass over the mount table,
+    or None if the mount table is unavailable
+    """
+    mounts = read_mounts()
+    if not mounts:
+        return None
+
+    # Later entries over-mount earlier ones on the same mount point
+    by_mount_point: Dict[str, Tuple[str, str]] = {}
+    for source, fstype, mount_point in mounts:
+        if fstype not in _PSEUDO_FILESYSTEMS:
+            by_mount_point.pop(mount_point, None)
+            by_mount_point[mount_point] = (source, fstype)
+
+    rows = []
+    for mount_point, (source, fstype) in by_mount_point.items():
+        try:
+            st = os.statvfs(mount_point)
+        except OSError:
+            continue
+        if st.f_blocks == 0:
+            continue
+        rows.append((source, mount_point, st))
+    if not rows:
+        return None
+
+    width = max(len("Filesystem"), max(len(source) for source, _, _ in rows))
+    usage = [f"{'Filesystem':<{width}} {'Size':>8} {'Used':>8} {'Avail':>8} {'Use%':>5}  Mounted on"]
+    inodes = [f"{'Filesystem':<{width}} {'Inodes':>10} {'IUsed':>10} {'IFree':>10} {'IUse%':>5}  Mounted on"]
+    for source, mount_point, st in rows:
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        avail = st.f_bavail * st.f_frsize
+        usable = used + avail
+        percent = f"{-(-used * 100 // usable)}%" if usable else "-"
+        usage.append(
+            f"{source:<{width}} {format_size(st.f_blocks * st.f_frsize):>8} {format_size(used):>8} "
+            f"{format_size(avail):>8} {percent:>5}  {mount_point}"
+        )
+
+        iused = st.f_files - st.f_ffree
+        ipercent = f"{-(-iused * 100 // st.f_files)}%" if st.f_files else "-"
+        inodes.append(f"{source:<{width}} {st.f_files:>10} {iused:>10} {st.f_ffree:>10} {ipercent:>5}  {mount_point}")
+
+    return "\n".join(usage) + "\n", "\n".join(inodes) + "\n"
+
+def du_bytes(paths: List[str], sudo: bool = False) -> Dict[str, int]:
+    """
+    Get disk usage in bytes for several paths with a single du invocation
+    """
+    argv = (["sudo"] if sudo else []) + ["du", "-sB1", "--"] + paths
+    try:
+        result = subprocess.run(
+            argv,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=False
+        )
+    except Exception:
+        return {}
+
+    # du prints "<bytes>\t<path>" per argument; missing paths only go to stderr
+    sizes = {}
+    for line in result.stdout.splitlines():
+        item = _parse_size_line(line)
+        if item:
+            sizes[item[1]] = item[0]
+    return sizes
+
+def parallel_du_top(root: str, max_depth: int, count: int, sudo: bool = False) -> List[Tuple[int, str]]:
+    """
+    Largest directories under root like du -x --max-depth, but with one du per
+    top-level subdirectory running concurrently so deep trees don't serialize
+    on a single walker
+    """
+    prefix = ["sudo"] if sudo else []
+    if max_depth < 1:
+        return stream_top_entries(prefix + ["du", "-sxB1", "--", root], count)
+
+    try:
+        result = subprocess.run(
+            _find_argv(root, "-mindepth", "1", "-maxdepth", "1", "-type", "d", "-print0", sudo=sudo),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors='replace',
+            check=False
+        )
+    except Exception:
+        return []
+
+    # Mount points below root are skipped, as du -x would
+    foreign_mounts = _mount_points_below(root) or set()
+    subdirs = [d for d in result.stdout.split("\0") if d and d not in foreign_mounts]
+
+    sub_argv = prefix + ["du", "-xB1", f"--max-depth={max_depth - 1}", "--"]
+    heap: List[Tuple[int, str]] = []
+    # -S leaves subdirectories out, giving just the files directly in root
+    own = stream_top_entries(prefix + ["du", "-sSxB1", "--", root], 1)
+    total = own[0][0] if own else 0
+
+    workers = min(16, max(4, os.cpu_count() or 1), len(subdirs) or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for subdir, entries in zip(subdirs, pool.map(lambda d: stream_top_entries(sub_argv + [d], count), subdirs)):
+            for item in entries:
+                if item[1] == subdir:
+                    total += item[0]
+                _push_top(heap, count, item)
+
+    _push_top(heap, count, (total, root))
+    return sorted(heap, reverse=True)
+
+def get_tree_size(path: str) -> int:
+    """Total size in bytes of a directory tree we can read, computed in-process"""
+    largest, _ = _dir_sizes_topk(path, 1, 0)
+    return largest[0][0] if largest else 0
+
+def print_sizes(paths: List[str], sudo: bool = False):
+    """Print "<size>  <path>" lines for paths that exist (sudo paths go through du -sB1)"""
+    sizes = du_bytes(paths, sudo=True) if sudo else {
+        path: get_tree_size(path) for path in paths if os.path.exists(path)
+    }
+    for path in paths:
+        if path in sizes:
+            print(f"{format_size(sizes[path]):>8}  {path}")
+
+_SIZE_UNITS = ((1 << 50, 'P'), (1 << 40, 'T'), (1 << 30, 'G'), (1 << 20, 'M'), (1 << 10, 'K'))
+
+def format_size(size_bytes: int) -> str:
+    """Format bytes to a short human readable size (like du -h)"""
+    for divisor, unit in _SIZE_UNITS:
+        if size_bytes >= divisor:
+            return f"{size_bytes / divisor:.1f}{unit}"
+    return f"{size_bytes}B"
+
+def _mount_points_below(root: str, fstypes: Optional[frozenset] = None) -> Optional[Set[str]]:
+    """
+    Paths (spelled relative to root as given) of mount points strictly inside
+    root, optionally only those of the given filesystem types, or None if the
+    mount table is unavailable. Walkers skip these to stay on one filesystem
+    like du -x without stat()ing every directory.
+    """
+    mounts = read_mounts()
+    if not mounts:
+        return None
+    real_root = os.path.realpath(root)
+    prefix = real_root.rstrip("/") + "/"
+    base = root.rstrip("/") or "/"
+    return {
+        os.path.join(base, mount_point[len(prefix):])
+        for _, fstype, mount_point in mounts
+        if mount_point.startswith(prefix) and mount_point != real_root
+        and (fstypes is None or fstype in fstypes)
+    }
+
+# Kernel filesystems whose files have no disk footprint (or fake sizes, like
+# /proc/kcore); scans that may cross mounts still never descend into these
+_NO_SCAN_FILESYSTEMS = _PSEUDO_FILESYSTEMS | {"devtmpfs"}
+
+def _pseudo_mounts_below(root: str) -> Set[str]:
+    return _mount_points_below(root, _NO_SCAN_FILESYSTEMS) or set()
+
+def _should_descend(entry: os.DirEntry, root_dev: int, foreign_mounts: Optional[Set[str]]) -> bool:
+    """
+    Whether a directory entry is on root's filesystem. Only stat()s it when
+    there is no mount table to consult; otherwise d_type from scandir is enough.
+    """
+    if foreign_mounts is None:
+        return entry.stat(follow_symlinks=False).st_dev == root_dev
+    return entry.path not in foreign_mounts
+
+def _walk_top_files(root: str, count: int) -> Tuple[List[Tuple[int, str]], int]:
+    """
+    Find the largest files under root without leaving its filesystem (like du -x).
+    Returns the (size, path) list sorted largest first and the number of
+    directories that could not be read.
+    """
+    try:
+        root_dev = os.stat(root).st_dev
+    except OSError:
+        return [], 1
+
+    foreign_mounts = _mount_points_below(root)
+    heap: List[Tuple[int, str]] = []
+    heappush, heapreplace = heapq.heappush, heapq.heapreplace
+    unreadable = 0
+    stack = [root]
+    push_dir = stack.append
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except PermissionError:
+            unreadable += 1
+            continue
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if _should_descend(entry, root_dev, foreign_mounts):
+                            push_dir(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        # Allocated blocks, as du counts them
+                        size = entry.stat(follow_symlinks=False).st_blocks * 512
+                        if len(heap) < count:
+                            heappush(heap, (size, entry.path))
+                        elif size > heap[0][0]:
+                            heapreplace(heap, (size, entry.path))
+                except OSError:
+                    continue
+
+    return sorted(heap, reverse=True), unreadable
+
+# Filesystems where every stat() is a round trip (WSL's 9p/drvfs view of the
+# Windows drives, network shares, FUSE). On these, overlapping stat calls across
+# threads wins; on local disks the thread hand-off costs more than it saves.
+_HIGH_LATENCY_FILESYSTEMS = frozenset({"9p", "drvfs", "virtiofs", "nfs", "nfs4", "cifs", "smb3"})
+
+def filesystem_type(path: str) -> str:
+    """Filesystem type of the mount containing path ("" if unknown)"""
+    real_path = os.path.realpath(path)
+    best_mount, fstype = "", ""
+    for _, mount_fstype, mount_point in read_mounts():
+        inside = real_path == mount_point or real_path.startswith(mount_point.rstrip("/") + "/")
+        # Later entries over-mount earlier ones, so ties go to the last one
+        if inside and len(mount_point) >= len(best_mount):
+            best_mount, fstype = mount_point, mount_fstype
+    return fstype
+
+def _is_high_latency_fs(path: str) -> bool:
+    fstype = filesystem_type(path)
+    return fstype in _HIGH_LATENCY_FILESYSTEMS or fstype.startswith("fuse")
+
+def _scan_directory_files(path: str, min_size: int, root_dev: int,
+                          foreign_mounts: Optional[Set[str]]) -> Tuple[List[Tuple[int, str]], List[str], int]:
+    """
+    List one directory: files larger than min_size, subdirectories on the same
+    filesystem, and 1 if the directory was unreadable (else 0)
+    """
+    files: List[Tuple[int, str]] = []
+    subdirs: List[str] = []
+    try:
+        entries = os.scandir(path)
+    except PermissionError:
+        return files, subdirs, 1
+    except OSError:
+        return files, subdirs, 0
+
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if _should_descend(entry, root_dev, foreign_mounts):
+                        subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    # Allocated blocks, as du counts them
+                    size = entry.stat(follow_symlinks=False).st_blocks * 512
+                    if size > min_size:
+                        files.append((size, entry.path))
+            except OSError:
+                continue
+    return files, subdirs, 0
+
+def _walk_top_files_parallel(root: str, count: int, workers: int = 16) -> Tuple[List[Tuple[int, str]], int]:
+    """
+    Same result as _walk_top_files, but directories are listed and stat()ed
+    from a thread pool so many round trips are in flight at once
+    """
+    try:
+        root_dev = os.stat(root).st_dev
+    except OSError:
+        return [], 1
+
+    foreign_mounts = _mount_points_below(root)
+    heap: List[Tuple[int, str]] = []
+    unreadable = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_directory_files, root, -1, root_dev, foreign_mounts)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs, denied = future.result()
+                unreadable += denied
+                for item in files:
+                    _push_top(heap, count, item)
+                # Workers drop files that can no longer make the top K
+                min_size = heap[0][0] if len(heap) >= count else -1
+                for subdir in subdirs:
+                    pending.add(executor.submit(_scan_directory_files, subdir, min_size, root_dev, foreign_mounts))
+
+    return sorted(heap, reverse=True), unreadable
+
+def _dir_sizes_topk(root: str, count: int, max_depth: int) -> Tuple[List[Tuple[int, str]], int]:
+    """
+    Total up disk usage bottom-up (like du -x --max-depth) and keep the
+    largest directories at depth <= max_depth. Returns the (size, path) list
+    sorted largest first and the number of directories that could not be read.
+    """
+    try:
+        root_st = os.stat(root)
+        root_entries = os.scandir(root)
+    except PermissionError:
+        return [], 1
+    except OSError:
+        return [], 0
+
+    root_dev = root_st.st_dev
+    foreign_mounts = _mount_points_below(root)
+    heap: List[Tuple[int, str]] = []
+    unreadable = 0
+    seen_inodes = set()
+    # Post-order DFS: each frame is [path, depth, scandir iterator, running total];
+    # a directory's own blocks count towards its total, as du counts them
+    stack = [[root, 0, root_entries, root_st.st_blocks * 512]]
+    while stack:
+        frame = stack[-1]
+        entry = next(frame[2], None)
+
+        if entry is None:
+            frame[2].close()
+            stack.pop()
+            path, depth, _, total = frame
+            if depth <= max_depth:
+                _push_top(heap, count, (total, path))
+            if stack:
+                stack[-1][3] += total
+            continue
+
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not _should_descend(entry, root_dev, foreign_mounts):
+                    continue
+                try:
+                    child_entries = os.scandir(entry.path)
+                except PermissionError:
+                    unreadable += 1
+                    continue
+                stack.append([entry.path, frame[1] + 1, child_entries, entry.stat(follow_symlinks=False).st_blocks * 512])
+            else:
+                st = entry.stat(follow_symlinks=False)
+                # Count hard-linked files once, as du does
+                if st.st_nlink > 1:
+                    if st.st_ino in seen_inodes:
+                        continue
+                    seen_inodes.add(st.st_ino)
+                frame[3] += st.st_blocks * 512
+        except OSError:
+            continue
+
+    return sorted(heap, reverse=True), unreadable
+
+def _scan_directory_bytes(path: str, root_dev: int, foreign_mounts: Optional[Set[str]],
+                          seen_inodes: Set[int], inode_lock: threading.Lock) -> Tuple[int, List[str], int]:
+    """
+    List one directory: allocated bytes of the directory itself and its
+    non-directory entries (as du counts them), subdirectories on the same
+    filesystem, and 1 if the directory was unreadable (else 0)
+    """
+    own = 0
+    subdirs: List[str] = []
+    try:
+        entries = os.scandir(path)
+    except PermissionError:
+        return own, subdirs, 1
+    except OSError:
+        return own, subdirs, 0
+
+    try:
+        own = os.stat(path, follow_symlinks=False).st_blocks * 512
+    except OSError:
+        pass
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if _should_descend(entry, root_dev, foreign_mounts):
+                        subdirs.append(entry.path)
+                else:
+                    st = entry.stat(follow_symlinks=False)
+                    if st.st_nlink > 1:
+                        with inode_lock:
+                            if st.st_ino in seen_inodes:
+                                continue
+                            seen_inodes.add(st.st_ino)
+                    own += st.st_blocks * 512
+            except OSError:
+                continue
+    return own, subdirs, 0
+
+def _parallel_dir_sizes(root: str, count: int, max_depth: int, workers: int = 16) -> Tuple[List[Tuple[int, str]], int]:
+    """
+    Same result as _dir_sizes_topk, but each directory is listed by a thread
+    pool worker so many round trips are in flight at once
+    """
+    try:
+        root_dev = os.stat(root).st_dev
+    except OSError:
+        return [], 1
+
+    foreign_mounts = _mount_points_below(root)
+    seen_inodes: Set[int] = set()
+    inode_lock = threading.Lock()
+    # Directories finish listing before their children are submitted, so
+    # completion order has every parent ahead of its subdirectories
+    order: List[Tuple[str, Optional[str], int]] = []
+    totals: Dict[str, int] = {}
+    unreadable = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def scan(path):
+            return executor.submit(_scan_directory_bytes, path, root_dev, foreign_mounts, seen_inodes, inode_lock)
+
+        pending = {scan(root): (root, None, 0)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, parent, depth = pending.pop(future)
+                own, subdirs, denied = future.result()
+                if denied:
+                    unreadable += 1
+                    continue
+                order.append((path, parent, depth))
+                totals[path] = own
+                for subdir in subdirs:
+                    pending[scan(subdir)] = (subdir, path, depth + 1)
+
+    heap: List[Tuple[int, str]] = []
+    for path, parent, depth in reversed(order):
+        if depth <= max_depth:
+            _push_top(heap, count, (totals[path], path))
+        if parent is not None:
+            totals[parent] += totals[path]
+    return sorted(heap, reverse=True), unreadable
+
+def docker_reclaimable() -> Optional[Dict[str, bool]]:
+    """
+    Map each 'docker system df' category (Images, Containers, Local Volumes,
+    Build Cache) to whether it has objects not in use, or None if unknown.
+    Counts are used rather than the Reclaimable size: a stopped container with
+    an empty writable layer still reports "0B" but is removed by a prune.
+    """
+    code, output = run_argv(["docker", "system", "df", "--format", "{{json .}}"], capture=True)
+    if code != 0:
+        return None
+
+    reclaimable = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue
+        try:
+            reclaimable[row.get("Type", "")] = int(row.get("TotalCount", 0)) > int(row.get("Active", 0))
+        except (TypeError, ValueError):
+            reclaimable[row.get("Type", "")] = True
+    return reclaimable or None
+
+def _walk_sizes(root: str, unreadable: List[str]) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (size, path) for non-empty regular files under root using scandir,
+    appending directories that could not be read to unreadable. Extra hard
+    links to an already seen inode are skipped since they take no extra space.
+    """
+    seen_inodes: Set[Tuple[int, int]] = set()
+    pseudo_mounts = _pseudo_mounts_below(root)
+    stack = [root]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except PermissionError:
+            unreadable.append(dir_path)
+            continue
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path not in pseudo_mounts:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if not st.st_size:
+                            continue
+                        if st.st_nlink > 1:
+                            key = (st.st_dev, st.st_ino)
+                            if key in seen_inodes:
+                                continue
+                            seen_inodes.add(key)
+                        yield st.st_size, entry.path
+                except OSError:
+                    continue
+
+def _list_directory_sizes(path: str, pseudo_mounts: Set[str]) -> Tuple[List[Tuple[int, str, int, int, int]], List[str], bool]:
+    """
+    List one directory for _walk_sizes_parallel: (size, path, nlink, dev, ino)
+    of non-empty files, subdirectories to visit, and whether it was unreadable
+    """
+    files: List[Tuple[int, str, int, int, int]] = []
+    subdirs: List[str] = []
+    try:
+        entries = os.scandir(path)
+    except PermissionError:
+        return files, subdirs, True
+    except OSError:
+        return files, subdirs, False
+
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in pseudo_mounts:
+                        subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    if st.st_size:
+                        files.append((st.st_size, entry.path, st.st_nlink, st.st_dev, st.st_ino))
+            except OSError:
+                continue
+    return files, subdirs, False
+
+def _walk_sizes_parallel(root: str, unreadable: List[str], workers: int = 16) -> Iterator[Tuple[int, str]]:
+    """
+    Same output as _walk_sizes, but directories are listed and stat()ed from a
+    thread pool so many round trips are in flight at once
+    """
+    seen_inodes: Set[Tuple[int, int]] = set()
+    pseudo_mounts = _pseudo_mounts_below(root)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_list_directory_sizes, root, pseudo_mounts): root}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_path = pending.pop(future)
+                files, subdirs, denied = future.result()
+                if denied:
+                    unreadable.append(dir_path)
+                for subdir in subdirs:
+                    pending[executor.submit(_list_directory_sizes, subdir, pseudo_mounts)] = subdir
+                for size, path, nlink, dev, ino in files:
+                    if nlink > 1:
+                        if (dev, ino) in seen_inodes:
+                            continue
+                        seen_inodes.add((dev, ino))
+                    yield size, path
+
+def _find_sizes(root: str, sudo: bool = False) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (size, path) for non-empty regular files under root using find (for
+    sudo scans). Like _walk_sizes, extra hard links to an already seen inode
+    are skipped.
+    """
+    argv = _find_argv(root, "-type", "f", "-size", "+0", "-printf", "%n %D %i %s\\t%p\\0", sudo=sudo, skip_pseudo=True)
+    try:
+        process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except Exception:
+        return
+
+    seen_inodes: Set[Tuple[int, int]] = set()
+    with process:
+        try:
+            pending = b""
+            for chunk in iter(lambda: process.stdout.read(1 << 16), b""):
+                records = (pending + chunk).split(b"\0")
+                pending = records.pop()
+                for record in records:
+                    header, _, path = record.partition(b"\t")
+                    nlink, dev, ino, size = (int(field) for field in header.split())
+                    if nlink > 1:
+                        if (dev, ino) in seen_inodes:
+                            continue
+                        seen_inodes.add((dev, ino))
+                    yield size, os.fsdecode(path)
+        except (KeyboardInterrupt, GeneratorExit):
+            process.terminate()
+            raise
+
+def size_collisions(files: Iterator[Tuple[int, str]]) -> Dict[int, List[str]]:
+    """
+    Group (size, path) pairs by exact size, keeping only sizes seen more than
+    once. Most sizes are unique, so those hold a bare path until a second
+    file with the same size turns up.
+    """
+    first: Dict[int, str] = {}
+    collisions: Dict[int, List[str]] = {}
+    for size, path in files:
+        other = first.setdefault(size, path)
+        if other is path:
+            continue
+        if size in collisions:
+            collisions[size].append(path)
+        else:
+            collisions[size] = [other, path]
+    return collisions
+
+_QUICK_HASH_BYTES = 1 << 20
+_QUICK_HASH_NAME = "xxh3" if xxhash is not None else "blake2b"
+
+def _quick_digest(path: str) -> Optional[bytes]:
+    """Digest of the first MiB of path (xxh3 when available), or None if unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(_QUICK_HASH_BYTES)
+    except OSError:
+        return None
+    if xxhash is not None:
+        return xxhash.xxh3_64_digest(head)
+    return hashlib.blake2b(head, digest_size=8).digest()
+
+def _quick_reject(candidates: List[Tuple[int, List[str]]],
+                  digests: Dict[str, Optional[bytes]]) -> List[Tuple[int, List[str]]]:
+    """
+    Split same-size groups of files larger than a MiB by a digest of their
+    first MiB, dropping files left without a match before the full hash.
+    Groups with a file we can't open ourselves are kept whole for sudo.
+    digests holds already known values and receives the new ones.
+    """
+    large = [path for size, paths in candidates if size > _QUICK_HASH_BYTES
+             for path in paths if path not in digests]
+    if large:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            digests.update(zip(large, pool.map(_quick_digest, large)))
+
+    refined = []
+    for size, paths in candidates:
+        if size <= _QUICK_HASH_BYTES or any(digests[path] is None for path in paths):
+            refined.append((size, paths))
+            continue
+        by_digest: Dict[bytes, List[str]] = {}
+        for path in paths:
+            by_digest.setdefault(digests[path], []).append(path)
+        refined.extend((size, same) for same in by_digest.values() if len(same) > 1)
+    return refined
+
+def _open_hash_cache() -> Optional[sqlite3.Connection]:
+    """Open (creating if needed) the on-disk digest cache, or None if unavailable"""
+    try:
+        os.makedirs(os.path.dirname(HASH_CACHE_DB), exist_ok=True)
+        conn = sqlite3.connect(HASH_CACHE_DB)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, "
+            "quick_algo TEXT, quick BLOB, sha256 TEXT)"
+        )
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+def _sha256_file(path: str) -> Optional[str]:
+    """SHA-256 hex digest of a file, or None if it can't be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb', buffering=0) as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def _sudo_sha256(paths: List[str]) -> Dict[str, str]:
+    """SHA-256 digests of files only root can read, via sudo xargs sha256sum"""
+    argv = ["sudo", "xargs", "-0", "-P", str(os.cpu_count() or 1), "-n", "32", "sha256sum", "-z", "--"]
+    try:
+        process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    except Exception:
+        return {}
+
+    # Paths are fed from a thread so a full stdout pipe can't stall the writes
+    def feed_paths():
+        try:
+            for path in paths:
+                process.stdin.write(os.fsencode(path) + b"\0")
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed_paths, daemon=True)
+    feeder.start()
+
+    digests: Dict[str, str] = {}
+    with process:
+        try:
+            # sha256sum -z prints "<hex>  <path>\0"
+            for record in process.stdout.read().split(b"\0"):
+                if len(record) > 66:
+                    digests[os.fsdecode(record[66:])] = record[:64].decode()
+        except KeyboardInterrupt:
+            process.terminate()
+            raise
+    feeder.join()
+    return digests
+
+def hash_duplicates(by_size: Dict[int, List[str]], sudo: bool = False) -> List[Tuple[int, List[str]]]:
+    """
+    Confirm same-size candidates by SHA-256 and return (size, paths) groups of
+    identical files, largest wasted space first. Only files that share a size
+    with another file are read; files over a MiB must also match on their
+    first MiB before being hashed in full. hashlib releases the GIL while
+    hashing, so the thread pool keeps every core busy. Digests are kept in
+    HASH_CACHE_DB so unchanged files are not read again on later runs.
+    """
+    candidates = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+    if not candidates:
+        return []
+
+    # Digests from earlier runs are reused while a file's (mtime, size) is unchanged
+    stamps: Dict[str, Tuple[int, int]] = {}
+    for size, paths in candidates:
+        for path in paths:
+            try:
+                stamps[path] = (os.stat(path).st_mtime_ns, size)
+            except OSError:
+                continue
+
+    quick: Dict[str, Optional[bytes]] = {}
+    digests: Dict[str, Optional[str]] = {}
+    conn = _open_hash_cache()
+    if conn is not None:
+        try:
+            query = "SELECT quick_algo, quick, sha256 FROM files WHERE path = ? AND mtime = ? AND size = ?"
+            for path, (mtime, size) in stamps.items():
+                row = conn.execute(query, (path, mtime, size)).fetchone()
+                if row:
+                    if row[0] == _QUICK_HASH_NAME and row[1] is not None:
+                        quick[path] = row[1]
+                    if row[2]:
+                        digests[path] = row[2]
+        except sqlite3.Error:
+            pass
+
+    candidates = _quick_reject(candidates, quick)
+    if candidates:
+        paths = [path for _, group in candidates for path in group if path not in digests]
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            digests.update(zip(paths, pool.map(_sha256_file, paths)))
+
+        denied = [path for path, digest in digests.items() if digest is None]
+        if denied and sudo:
+            digests.update(_sudo_sha256(denied))
+
+    if conn is not None:
+        rows = [
+            (path, mtime, size, _QUICK_HASH_NAME, quick.get(path), digests.get(path))
+            for path, (mtime, size) in stamps.items()
+            if quick.get(path) is not None or digests.get(path)
+        ]
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            pass
+        conn.close()
+
+    groups = []
+    for size, paths in candidates:
+        by_digest: Dict[str, List[str]] = {}
+        for path in paths:
+            digest = digests.get(path)
+            if digest:
+                by_digest.setdefault(digest, []).append(path)
+        groups.extend((size, same) for same in by_digest.values() if len(same) > 1)
+
+    groups.sort(key=lambda group: group[0] * (len(group[1]) - 1), reverse=True)
+    return groups
+
+_UNLINK_BATCH_SIZE = 256
+
+def _unlink_batch(dir_path: str, names: List[str]):
+    """Unlink names relative to one open directory fd (unlinkat), skipping the per-file path walk"""
+    try:
+        dir_fd = os.open(dir_path, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW)
+    except OSError:
+        return
+    try:
+        for name in names:
+            try:
+                os.unlink(name, dir_fd=dir_fd)
+            except OSError:
+                pass
+    finally:
+        os.close(dir_fd)
+
+def _rimraf_contents(root: str, workers: int = 8) -> int:
+    """
+    Remove everything inside root like `rm -rf root/*` (hidden top-level
+    entries are kept, as the shell glob would). Files are unlinked in batches
+    spread over a thread pool, so a cache made of a few huge directories
+    (thumbnails, pip wheels) still deletes in parallel. Returns the number of
+    top-level entries that could not be removed.
+    """
+    try:
+        with os.scandir(root) as it:
+            top_level = [entry.path for entry in it if not entry.name.startswith(".")]
+    except OSError:
+        return 0
+    if not top_level:
+        return 0
+
+    directories: List[str] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit_files(dir_path: str, names: List[str]):
+            for i in range(0, len(names), _UNLINK_BATCH_SIZE):
+                executor.submit(_unlink_batch, dir_path, names[i:i + _UNLINK_BATCH_SIZE])
+
+        root_files = []
+        for path in top_level:
+            if os.path.isdir(path) and not os.path.islink(path):
+                directories.append(path)
+            else:
+                root_files.append(os.path.basename(path))
+        submit_files(root, root_files)
+
+        # Pre-order walk: queue each directory's files as soon as it is listed
+        index = 0
+        while index < len(directories):
+            dir_path = directories[index]
+            index += 1
+            names = []
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                        else:
+                            names.append(entry.name)
+            except OSError:
+                continue
+            submit_files(dir_path, names)
+
+    # All unlinks are done once the pool has drained; remove the now-empty
+    # directories deepest first
+    for dir_path in reversed(directories):
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            pass
+
+    return sum(1 for path in top_level if os.path.lexists(path))
+
+def _temp_cleanup_argv(path: str) -> List[str]:
+    """sudo command removing the non-hidden contents of path without a shell glob"""
+    return ["sudo", "find", path, "-mindepth", "1", "-maxdepth", "1", "!", "-name", ".*",
+            "-exec", "rm", "-rf", "--", "{}", "+"]
+
+def _apt_index_fresh(max_age_seconds: int = 86400) -> bool:
+    """Check whether apt's package index was refreshed recently"""
+    try:
+        stamp = os.stat("/var/lib/apt/periodic/update-success-stamp")
+    except OSError:
+        return False
+    return time.time() - stamp.st_mtime < max_age_seconds
 
 def install_tool(tool: str) -> bool:
     """Attempt to install a missing tool"""
-    print_info(f"Installing {tool}...")
-    code, _ = run_command(f"sudo apt-get update && sudo apt-get install -y {tool}")
+    return install_tools([tool])
+
+def install_tools(tools: List[str]) -> bool:
+    """Install several apt packages with a single apt-get run (one dependency solve)"""
+    print_info(f"Installing {', '.join(tools)}...")
+    if _apt_index_fresh():
+        argv = ["sudo", "apt-get", "install", "-y", *tools]
+    else:
+        quoted = " ".join(shlex.quote(tool) for tool in tools)
+        argv = ["sudo", "sh", "-c", f"apt-get update && apt-get install -y {quoted}"]
+    code, _ = run_argv(argv)
+    check_tool_installed.cache_clear()
     return code == 0
 
+def prompt_depth(prompt: str, default: int) -> int:
+    """Ask for a directory depth until a whole number of at least 1 is entered"""
+    while True:
+        answer = input(prompt).strip() or str(default)
+        if answer.isdigit() and int(answer) >= 1:
+            return int(answer)
+        print_error("Depth must be a whole number of at least 1")
+
 class StorageManager:
     def __init__(self):
         self.has_sudo = check_sudo()
+        self._home = os.path.normpath(HOME)
+
+    def _use_sudo(self, path: str) -> bool:
+        """Whether a scan of the path as typed by the user should run under sudo"""
+        return self.has_sudo and path.startswith("/") and os.path.normpath(path) != self._home
 
     def show_main_menu(self):
         """Display the main menu"""
+        dispatch = {
+            "1": self.storage_visualization_menu,
+            "2": self.system_cleanup_menu,
+            "3": self.docker_management_menu,
+            "4": self.advanced_analysis_menu,
+            "5": self.check_install_tools,
+            "6": self.show_wsl_compaction_info,
+        }
+
         while True:
             print_header("Linux Storage Manager")
 
@@ -98,32 +1266,16 @@ class StorageManager:
             print(f"{Colors.BOLD}Current Disk Usage:{Colors.ENDC}")
             print(get_disk_usage())
 
-            print(f"\n{Colors.BOLD}Main Menu:{Colors.ENDC}")
-            print(f"{Colors.CYAN}1.{Colors.ENDC} Storage Visualization")
-            print(f"{Colors.CYAN}2.{Colors.ENDC} System Cleanup (Safe)")
-            print(f"{Colors.CYAN}3.{Colors.ENDC} Docker Management")
-            print(f"{Colors.CYAN}4.{Colors.ENDC} Advanced Analysis")
-            print(f"{Colors.CYAN}5.{Colors.ENDC} Check & Install Tools")
-            print(f"{Colors.CYAN}6.{Colors.ENDC} WSL Disk Compaction Info")
-            print(f"{Colors.RED}0.{Colors.ENDC} Exit")
+            sys.stdout.write(_MAIN_MENU)
 
             if not self.has_sudo:
                 print_warning("Running without sudo - some features may be limited")
 
             choice = input(f"\n{Colors.BOLD}Select an option:{Colors.ENDC} ").strip()
 
-            if choice == "1":
-                self.storage_visualization_menu()
-            elif choice == "2":
-                self.system_cleanup_menu()
-            elif choice == "3":
-                self.docker_management_menu()
-            elif choice == "4":
-                self.advanced_analysis_menu()
-            elif choice == "5":
-                self.check_install_tools()
-            elif choice == "6":
-                self.show_wsl_compaction_info()
+            handler = dispatch.get(choice)
+            if handler:
+                handler()
             elif choice == "0":
                 print_info("Exiting Storage Manager. Goodbye!")
                 sys.exit(0)
@@ -133,35 +1285,26 @@ class StorageManager:
 
     def storage_visualization_menu(self):
         """Storage visualization submenu"""
+        dispatch = {
+            "1": self.run_ncdu,
+            "2": self.run_du_analysis,
+            "3": self.run_df,
+            "4": self.run_dust,
+            "5": self.run_duf,
+            "6": self.show_top_directories,
+            "7": self.check_space_hogs,
+        }
+
         while True:
             print_header("Storage Visualization")
 
-            print(f"{Colors.BOLD}Visualization Options:{Colors.ENDC}")
-            print(f"{Colors.CYAN}1.{Colors.ENDC} Interactive disk usage (ncdu) - RECOMMENDED")
-            print(f"{Colors.CYAN}2.{Colors.ENDC} Quick directory size overview (du)")
-            print(f"{Colors.CYAN}3.{Colors.ENDC} Filesystem overview (df)")
-            print(f"{Colors.CYAN}4.{Colors.ENDC} Modern disk usage (dust)")
-            print(f"{Colors.CYAN}5.{Colors.ENDC} Modern filesystem overview (duf)")
-            print(f"{Colors.CYAN}6.{Colors.ENDC} Top 20 largest directories")
-            print(f"{Colors.CYAN}7.{Colors.ENDC} Common space hogs quick check")
-            print(f"{Colors.RED}0.{Colors.ENDC} Back to main menu")
+            sys.stdout.write(_VISUALIZATION_MENU)
 
             choice = input(f"\n{Colors.BOLD}Select an option:{Colors.ENDC} ").strip()
 
-            if choice == "1":
-                self.run_ncdu()
-            elif choice == "2":
-                self.run_du_analysis()
-            elif choice == "3":
-                self.run_df()
-            elif choice == "4":
-                self.run_dust()
-            elif choice == "5":
-                self.run_duf()
-            elif choice == "6":
-                self.show_top_directories()
-            elif choice == "7":
-                self.check_space_hogs()
+            handler = dispatch.get(choice)
+            if handler:
+                handler()
             elif choice == "0":
                 break
             else:
@@ -188,28 +1331,44 @@ class StorageManager:
 
         path = input(f"Enter path to scan (default: /): ").strip() or "/"
 
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
-        run_command(f"{sudo}ncdu {path}", shell=True)
+        use_sudo = self._use_sudo(path)
+        run_argv((["sudo"] if use_sudo else []) + ["ncdu", "--", os.path.expanduser(path)])
 
     def run_du_analysis(self):
         """Run du command for directory analysis"""
         print_info("Directory Size Analysis")
 
         path = input(f"Enter path to analyze (default: /): ").strip() or "/"
-        depth = input(f"Enter depth level (default: 1): ").strip() or "1"
+        max_depth = prompt_depth("Enter depth level (default: 1): ", 1)
 
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
+        use_sudo = self._use_sudo(path)
+        path = os.path.expanduser(path)
 
         print(f"\n{Colors.BOLD}Top directories in {path}:{Colors.ENDC}")
-        run_command(f"{sudo}du -h -d {depth} {path} 2>/dev/null | sort -hr | head -20")
+        walker = _parallel_dir_sizes if _is_high_latency_fs(path) else _dir_sizes_topk
+        largest, unreadable = walker(path, 20, max_depth)
+        if unreadable and use_sudo:
+            # Directories we can't read would be under-counted; let du do it with sudo
+            largest = parallel_du_top(path, max_depth, 20, sudo=True)
+
+        for size, dir_path in largest:
+            print(f"{format_size(size):>8}  {dir_path}")
 
     def run_df(self):
         """Run df command for filesystem overview"""
+        tables = filesystem_tables()
+
         print(f"\n{Colors.BOLD}Filesystem Usage:{Colors.ENDC}")
-        run_command("df -h")
+        if tables:
+            sys.stdout.write(tables[0])
+        else:
+            run_argv(["df", "-h"])
 
         print(f"\n{Colors.BOLD}Inode Usage:{Colors.ENDC}")
-        run_command("df -i")
+        if tables:
+            sys.stdout.write(tables[1])
+        else:
+            run_argv(["df", "-i"])
 
     def run_dust(self):
         """Run dust for modern disk usage visualization"""
@@ -217,7 +1376,8 @@ class StorageManager:
             print_warning("dust is not installed.")
             if input("Would you like to install it via snap? (y/n): ").lower() == 'y':
                 print_info("Installing dust via snap...")
-                code, _ = run_command("sudo snap install dust")
+                code, _ = run_argv(["sudo", "snap", "install", "dust"])
+                check_tool_installed.cache_clear()
                 if code == 0:
                     print_success("dust installed successfully!")
                 else:
@@ -229,7 +1389,7 @@ class StorageManager:
         path = input(f"Enter path to analyze (default: /): ").strip() or "/"
         depth = input(f"Enter depth level (default: 3): ").strip() or "3"
 
-        run_command(f"dust -d {depth} {path}")
+        run_argv(["dust", "-d", depth, os.path.expanduser(path)])
 
     def run_duf(self):
         """Run duf for modern filesystem overview"""
@@ -244,15 +1404,77 @@ class StorageManager:
             else:
                 return
 
-        run_command("duf")
+        run_argv(["duf"])
 
     def show_top_directories(self):
         """Show top 20 largest directories/files"""
         print_info("Finding top 20 largest directories and files...")
         print_warning("This may take a few minutes...")
 
-        sudo = "sudo " if self.has_sudo else ""
-        run_command(f"{sudo}du -ahx / 2>/dev/null | sort -rh | head -20")
+        argv = (["sudo"] if self.has_sudo else []) + ["du", "-axB1", "/"]
+        try:
+            process = subprocess.Popen(
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                errors='replace'
+            )
+        except Exception as e:
+            print_error(f"Failed to run du: {e}")
+            return
+
+        # du runs in a reader thread so the main thread can redraw the running
+        # top 20 while the scan is still going, and Ctrl-C keeps a partial answer
+        entries: queue.Queue = queue.Queue(maxsize=10000)
+
+        def read_du_output():
+            for line in process.stdout:
+                item = _parse_size_line(line)
+                if item:
+                    entries.put(item)
+            entries.put(None)
+
+        threading.Thread(target=read_du_output, daemon=True).start()
+
+        heap: List[Tuple[int, str]] = []
+        scanned = 0
+        live = sys.stdout.isatty()
+        last_draw = time.monotonic()
+        interrupted = False
+
+        def draw(title: str):
+            lines = [f"{format_size(size):>8}  {path}" for size, path in sorted(heap, reverse=True)]
+            if live:
+                sys.stdout.write("\x1b[2J\x1b[H")
+            sys.stdout.write(f"{Colors.BOLD}{title}{Colors.ENDC}\n" + "\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+        try:
+            while True:
+                try:
+                    item = entries.get(timeout=0.25)
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if item:
+                    scanned += 1
+                    _push_top(heap, 20, item)
+
+                now = time.monotonic()
+                if live and now - last_draw >= 0.25:
+                    draw(f"Scanning... {scanned} entries so far (Ctrl-C to stop)")
+                    last_draw = now
+        except KeyboardInterrupt:
+            process.terminate()
+            interrupted = True
+        finally:
+            process.wait()
+
+        draw(f"Top 20 largest directories and files ({scanned} entries scanned):")
+        if interrupted:
+            print_warning("Scan interrupted - results are partial")
 
     def check_space_hogs(self):
         """Check common locations for space hogs"""
@@ -268,55 +1490,54 @@ class StorageManager:
             ("/var/tmp", "Variable temporary files"),
         ]
 
-        sudo = "sudo " if self.has_sudo else ""
+        # One du per location, run concurrently: wall time is the slowest path
+        # (usually /var/lib/docker) instead of the sum of all of them
+        sizes: Dict[str, int] = {}
+        with ThreadPoolExecutor(max_workers=min(8, len(locations))) as executor:
+            for result in executor.map(lambda p: du_bytes([p], sudo=self.has_sudo),
+                                       [path for path, _ in locations]):
+                sizes.update(result)
 
         for path, description in locations:
-            code, output = run_command(f"{sudo}du -sh {path} 2>/dev/null", capture=True)
-            if code == 0:
-                size = output.split()[0] if output else "N/A"
-                print(f"{Colors.BOLD}{description:30}{Colors.ENDC} {size:>10} ({path})")
+            if path in sizes:
+                print(f"{Colors.BOLD}{description:30}{Colors.ENDC} {format_size(sizes[path]):>10} ({path})")
 
         print(f"\n{Colors.BOLD}Home directories:{Colors.ENDC}")
-        run_command(f"{sudo}du -sh /home/* 2>/dev/null")
+        try:
+            with os.scandir("/home") as it:
+                homes = sorted(entry.path for entry in it if not entry.name.startswith("."))
+        except OSError:
+            homes = []
+        if homes:
+            print_sizes(homes, sudo=self.has_sudo)
 
         if check_tool_installed("docker"):
             print(f"\n{Colors.BOLD}Docker system usage:{Colors.ENDC}")
-            run_command("docker system df")
+            run_argv(["docker", "system", "df"])
 
     def system_cleanup_menu(self):
         """System cleanup submenu"""
+        dispatch = {
+            "1": self.clean_apt_cache,
+            "2": self.clean_journal_logs,
+            "3": self.clean_temp_files,
+            "4": self.clean_user_cache,
+            "5": self.clean_thumbnails,
+            "6": self.clean_npm_cache,
+            "7": self.clean_pip_cache,
+            "8": self.run_all_safe_cleanups,
+        }
+
         while True:
             print_header("System Cleanup (Safe Operations)")
 
-            print(f"{Colors.BOLD}Cleanup Options:{Colors.ENDC}")
-            print(f"{Colors.CYAN}1.{Colors.ENDC} Clean APT package cache")
-            print(f"{Colors.CYAN}2.{Colors.ENDC} Clean old journal logs")
-            print(f"{Colors.CYAN}3.{Colors.ENDC} Clean temporary files")
-            print(f"{Colors.CYAN}4.{Colors.ENDC} Clean user caches")
-            print(f"{Colors.CYAN}5.{Colors.ENDC} Clean thumbnail cache")
-            print(f"{Colors.CYAN}6.{Colors.ENDC} Clean npm cache (if installed)")
-            print(f"{Colors.CYAN}7.{Colors.ENDC} Clean pip cache (if installed)")
-            print(f"{Colors.CYAN}8.{Colors.ENDC} Run ALL safe cleanups")
-            print(f"{Colors.RED}0.{Colors.ENDC} Back to main menu")
+            sys.stdout.write(_CLEANUP_MENU)
 
             choice = input(f"\n{Colors.BOLD}Select an option:{Colors.ENDC} ").strip()
 
-            if choice == "1":
-                self.clean_apt_cache()
-            elif choice == "2":
-                self.clean_journal_logs()
-            elif choice == "3":
-                self.clean_temp_files()
-            elif choice == "4":
-                self.clean_user_cache()
-            elif choice == "5":
-                self.clean_thumbnails()
-            elif choice == "6":
-                self.clean_npm_cache()
-            elif choice == "7":
-                self.clean_pip_cache()
-            elif choice == "8":
-                self.run_all_safe_cleanups()
+            handler = dispatch.get(choice)
+            if handler:
+                handler()
             elif choice == "0":
                 break
             else:
@@ -330,33 +1551,28 @@ class StorageManager:
         print_header("Cleaning APT Cache")
 
         print_info("Checking current APT cache size...")
-        run_command("sudo du -sh /var/cache/apt 2>/dev/null")
+        print_sizes(["/var/cache/apt"], sudo=True)
 
         if input("\nProceed with cleanup? (y/n): ").lower() != 'y':
             print_warning("Cleanup cancelled")
             return
 
-        print_info("Cleaning APT cache...")
-        run_command("sudo apt-get clean")
-        print_success("APT clean completed")
-
-        print_info("Removing automatically installed packages...")
-        run_command("sudo apt-get autoclean")
-        print_success("APT autoclean completed")
-
-        print_info("Removing unused packages...")
-        run_command("sudo apt-get autoremove -y")
-        print_success("APT autoremove completed")
+        print_info("Cleaning APT cache, obsolete packages and unused dependencies...")
+        code, _ = run_argv(APT_CLEANUP_ARGV)
+        if code == 0:
+            print_success("APT clean, autoclean and autoremove completed")
+        else:
+            print_error("APT cleanup failed")
 
         print_info("New APT cache size:")
-        run_command("sudo du -sh /var/cache/apt 2>/dev/null")
+        print_sizes(["/var/cache/apt"], sudo=True)
 
     def clean_journal_logs(self):
         """Clean old systemd journal logs"""
         print_header("Cleaning Journal Logs")
 
         print_info("Current journal disk usage:")
-        run_command("sudo journalctl --disk-usage")
+        run_argv(["sudo", "journalctl", "--disk-usage"])
 
         days = input("\nKeep logs from last N days (default: 3): ").strip() or "3"
 
@@ -365,11 +1581,11 @@ class StorageManager:
             return
 
         print_info(f"Cleaning logs older than {days} days...")
-        run_command(f"sudo journalctl --vacuum-time={days}d")
+        run_argv(["sudo", "journalctl", f"--vacuum-time={days}d"])
         print_success("Journal cleanup completed")
 
         print_info("New journal disk usage:")
-        run_command("sudo journalctl --disk-usage")
+        run_argv(["sudo", "journalctl", "--disk-usage"])
 
     def clean_temp_files(self):
         """Clean temporary files"""
@@ -377,52 +1593,55 @@ class StorageManager:
 
         print_warning("This will remove all files in /tmp and /var/tmp")
         print_info("Checking current size...")
-        run_command("sudo du -sh /tmp 2>/dev/null")
-        run_command("sudo du -sh /var/tmp 2>/dev/null")
+        print_sizes(["/tmp", "/var/tmp"], sudo=True)
 
         if input("\nProceed with cleanup? (y/n): ").lower() != 'y':
             print_warning("Cleanup cancelled")
             return
 
         print_info("Cleaning /tmp...")
-        run_command("sudo rm -rf /tmp/*")
+        run_argv(_temp_cleanup_argv("/tmp"))
         print_success("/tmp cleaned")
 
         print_info("Cleaning /var/tmp...")
-        run_command("sudo rm -rf /var/tmp/*")
+        run_argv(_temp_cleanup_argv("/var/tmp"))
         print_success("/var/tmp cleaned")
 
     def clean_user_cache(self):
         """Clean user cache directory"""
         print_header("Cleaning User Cache")
 
-        cache_path = os.path.expanduser("~/.cache")
+        cache_path = CACHE_DIR
         print_info(f"Checking cache size at {cache_path}...")
-        run_command(f"du -sh {cache_path} 2>/dev/null")
+        print_sizes([cache_path])
 
         if input("\nProceed with cleanup? (y/n): ").lower() != 'y':
             print_warning("Cleanup cancelled")
             return
 
         print_info("Cleaning user cache...")
-        run_command(f"rm -rf {cache_path}/*")
+        failed = _rimraf_contents(cache_path)
+        if failed:
+            print_warning(f"{failed} entries could not be removed")
         print_success("User cache cleaned")
 
     def clean_thumbnails(self):
         """Clean thumbnail cache"""
         print_header("Cleaning Thumbnail Cache")
 
-        thumb_path = os.path.expanduser("~/.cache/thumbnails")
+        thumb_path = os.path.join(CACHE_DIR, "thumbnails")
         if os.path.exists(thumb_path):
             print_info(f"Checking thumbnail cache size...")
-            run_command(f"du -sh {thumb_path} 2>/dev/null")
+            print_sizes([thumb_path])
 
             if input("\nProceed with cleanup? (y/n): ").lower() != 'y':
                 print_warning("Cleanup cancelled")
                 return
 
             print_info("Cleaning thumbnails...")
-            run_command(f"rm -rf {thumb_path}/*")
+            failed = _rimraf_contents(thumb_path)
+            if failed:
+                print_warning(f"{failed} entries could not be removed")
             print_success("Thumbnail cache cleaned")
         else:
             print_info("No thumbnail cache found")
@@ -435,15 +1654,21 @@ class StorageManager:
 
         print_header("Cleaning npm Cache")
 
-        print_info("Checking npm cache...")
-        run_command("npm cache verify")
+        # Just size the cache directory: 'npm cache verify' walks and rewrites
+        # the whole index, which is slow on a large cache we are about to delete
+        npm_cache = os.environ.get("npm_config_cache") or os.path.join(HOME, ".npm")
+        if os.path.exists(npm_cache):
+            print_info("Checking npm cache size...")
+            print_sizes([npm_cache])
+        else:
+            print_info(f"No npm cache found at {npm_cache}")
 
         if input("\nProceed with cleanup? (y/n): ").lower() != 'y':
             print_warning("Cleanup cancelled")
             return
 
         print_info("Cleaning npm cache...")
-        run_command("npm cache clean --force")
+        run_argv(["npm", "cache", "clean", "--force"])
         print_success("npm cache cleaned")
 
     def clean_pip_cache(self):
@@ -454,17 +1679,19 @@ class StorageManager:
 
         print_header("Cleaning pip Cache")
 
-        pip_cache = os.path.expanduser("~/.cache/pip")
+        pip_cache = os.path.join(CACHE_DIR, "pip")
         if os.path.exists(pip_cache):
             print_info(f"Checking pip cache size...")
-            run_command(f"du -sh {pip_cache} 2>/dev/null")
+            print_sizes([pip_cache])
 
             if input("\nProceed with cleanup? (y/n): ").lower() != 'y':
                 print_warning("Cleanup cancelled")
                 return
 
             print_info("Cleaning pip cache...")
-            run_command(f"rm -rf {pip_cache}/*")
+            failed = _rimraf_contents(pip_cache)
+            if failed:
+                print_warning(f"{failed} entries could not be removed")
             print_success("pip cache cleaned")
         else:
             print_info("No pip cache found")
@@ -492,39 +1719,40 @@ class StorageManager:
         print("\n" + "="*70)
         print("APT Cache Cleanup")
         print("="*70)
-        run_command("sudo apt-get clean")
-        run_command("sudo apt-get autoclean")
-        run_command("sudo apt-get autoremove -y")
+        run_argv(APT_CLEANUP_ARGV)
 
         print("\n" + "="*70)
         print("Journal Logs Cleanup")
         print("="*70)
-        run_command("sudo journalctl --vacuum-time=3d")
+        run_argv(["sudo", "journalctl", "--vacuum-time=3d"])
 
         print("\n" + "="*70)
         print("Temporary Files Cleanup")
         print("="*70)
-        run_command("sudo rm -rf /tmp/*")
-        run_command("sudo rm -rf /var/tmp/*")
+        run_argv(_temp_cleanup_argv("/tmp"))
+        run_argv(_temp_cleanup_argv("/var/tmp"))
 
         print("\n" + "="*70)
         print("User Cache Cleanup")
         print("="*70)
-        cache_path = os.path.expanduser("~/.cache")
-        run_command(f"rm -rf {cache_path}/*")
+        failed = _rimraf_contents(CACHE_DIR)
+        if failed:
+            print_warning(f"{failed} entries could not be removed")
 
         if check_tool_installed("npm"):
             print("\n" + "="*70)
             print("npm Cache Cleanup")
             print("="*70)
-            run_command("npm cache clean --force 2>/dev/null")
+            run_argv(["npm", "cache", "clean", "--force"], capture=True)
 
-        pip_cache = os.path.expanduser("~/.cache/pip")
+        pip_cache = os.path.join(CACHE_DIR, "pip")
         if os.path.exists(pip_cache):
             print("\n" + "="*70)
             print("pip Cache Cleanup")
             print("="*70)
-            run_command(f"rm -rf {pip_cache}/*")
+            failed = _rimraf_contents(pip_cache)
+            if failed:
+                print_warning(f"{failed} entries could not be removed")
 
         print_success("\nAll safe cleanups completed!")
         print_info("Disk usage after cleanup:")
@@ -537,50 +1765,33 @@ class StorageManager:
             input("Press Enter to continue...")
             return
 
+        dispatch = {
+            "1": self.show_docker_storage,
+            "2": self.list_docker_containers,
+            "3": self.list_docker_images,
+            "4": self.list_docker_volumes,
+            "5": self.remove_stopped_containers,
+            "6": self.remove_dangling_images,
+            "7": self.remove_unused_networks,
+            "8": self.remove_build_cache,
+            "9": self.remove_all_unused_images,
+            "10": self.remove_unused_volumes,
+            "11": self.safe_docker_cleanup,
+        }
+
         while True:
             print_header("Docker Management")
 
             print(f"{Colors.BOLD}Docker Storage Info:{Colors.ENDC}")
-            run_command("docker system df")
-
-            print(f"\n{Colors.BOLD}Docker Management Options:{Colors.ENDC}")
-            print(f"{Colors.CYAN}1.{Colors.ENDC} Show Docker storage details")
-            print(f"{Colors.CYAN}2.{Colors.ENDC} List all containers (running & stopped)")
-            print(f"{Colors.CYAN}3.{Colors.ENDC} List all images")
-            print(f"{Colors.CYAN}4.{Colors.ENDC} List all volumes")
-            print(f"{Colors.CYAN}5.{Colors.ENDC} Remove stopped containers (SAFE)")
-            print(f"{Colors.CYAN}6.{Colors.ENDC} Remove dangling images (SAFE)")
-            print(f"{Colors.CYAN}7.{Colors.ENDC} Remove unused networks (SAFE)")
-            print(f"{Colors.CYAN}8.{Colors.ENDC} Remove build cache (SAFE)")
-            print(f"{Colors.YELLOW}9.{Colors.ENDC} Remove ALL unused images (removes images not in use)")
-            print(f"{Colors.RED}10.{Colors.ENDC} Remove unused volumes (DANGEROUS - may lose data!)")
-            print(f"{Colors.CYAN}11.{Colors.ENDC} Safe Docker cleanup (containers + dangling images + build cache)")
-            print(f"{Colors.RED}0.{Colors.ENDC} Back to main menu")
+            run_argv(["docker", "system", "df"])
+
+            sys.stdout.write(_DOCKER_MENU)
 
             choice = input(f"\n{Colors.BOLD}Select an option:{Colors.ENDC} ").strip()
 
-            if choice == "1":
-                self.show_docker_storage()
-            elif choice == "2":
-                self.list_docker_containers()
-            elif choice == "3":
-                self.list_docker_images()
-            elif choice == "4":
-                self.list_docker_volumes()
-            elif choice == "5":
-                self.remove_stopped_containers()
-            elif choice == "6":
-                self.remove_dangling_images()
-            elif choice == "7":
-                self.remove_unused_networks()
-            elif choice == "8":
-                self.remove_build_cache()
-            elif choice == "9":
-                self.remove_all_unused_images()
-            elif choice == "10":
-                self.remove_unused_volumes()
-            elif choice == "11":
-                self.safe_docker_cleanup()
+            handler = dispatch.get(choice)
+            if handler:
+                handler()
             elif choice == "0":
                 break
             else:
@@ -592,36 +1803,36 @@ class StorageManager:
     def show_docker_storage(self):
         """Show detailed Docker storage information"""
         print_header("Docker Storage Details")
-        run_command("docker system df -v")
+        run_argv(["docker", "system", "df", "-v"])
 
     def list_docker_containers(self):
         """List all Docker containers"""
         print_header("Docker Containers")
-        run_command("docker ps -a")
+        run_argv(["docker", "ps", "-a"])
 
     def list_docker_images(self):
         """List all Docker images"""
         print_header("Docker Images")
-        run_command("docker images -a")
+        run_argv(["docker", "images", "-a"])
 
     def list_docker_volumes(self):
         """List all Docker volumes"""
         print_header("Docker Volumes")
-        run_command("docker volume ls")
+        run_argv(["docker", "volume", "ls"])
 
     def remove_stopped_containers(self):
         """Remove stopped containers"""
         print_header("Remove Stopped Containers")
 
         print_info("Listing stopped containers...")
-        run_command("docker ps -a -f status=exited -f status=created")
+        run_argv(["docker", "ps", "-a", "-f", "status=exited", "-f", "status=created"])
 
         if input("\nRemove these stopped containers? (y/n): ").lower() != 'y':
             print_warning("Operation cancelled")
             return
 
         print_info("Removing stopped containers...")
-        run_command("docker container prune -f")
+        run_argv(["docker", "container", "prune", "-f"])
         print_success("Stopped containers removed")
 
     def remove_dangling_images(self):
@@ -629,14 +1840,14 @@ class StorageManager:
         print_header("Remove Dangling Images")
 
         print_info("Listing dangling images...")
-        run_command("docker images -f dangling=true")
+        run_argv(["docker", "images", "-f", "dangling=true"])
 
         if input("\nRemove these dangling images? (y/n): ").lower() != 'y':
             print_warning("Operation cancelled")
             return
 
         print_info("Removing dangling images...")
-        run_command("docker image prune -f")
+        run_argv(["docker", "image", "prune", "-f"])
         print_success("Dangling images removed")
 
     def remove_unused_networks(self):
@@ -644,7 +1855,7 @@ class StorageManager:
         print_header("Remove Unused Networks")
 
         print_info("Removing unused networks...")
-        run_command("docker network prune -f")
+        run_argv(["docker", "network", "prune", "-f"])
         print_success("Unused networks removed")
 
     def remove_build_cache(self):
@@ -652,7 +1863,7 @@ class StorageManager:
         print_header("Remove Build Cache")
 
         print_info("Checking build cache...")
-        run_command("docker system df")
+        run_argv(["docker", "system", "df"])
 
         if input("\nRemove all build cache? (y/n): ").lower() != 'y':
             print_warning("Operation cancelled")
@@ -664,7 +1875,7 @@ class StorageManager:
             return
 
         print_info("Removing build cache...")
-        run_command("docker builder prune -a -f")
+        run_argv(["docker", "builder", "prune", "-a", "-f"])
         print_success("Build cache removed")
 
     def remove_all_unused_images(self):
@@ -674,7 +1885,7 @@ class StorageManager:
         print_warning("This will remove ALL images not associated with a container")
         print_warning("If you have stopped containers, their images will be deleted!")
         print_info("Listing all images...")
-        run_command("docker images -a")
+        run_argv(["docker", "images", "-a"])
 
         if input("\nProceed with removal? (y/n): ").lower() != 'y':
             print_warning("Operation cancelled")
@@ -685,7 +1896,7 @@ class StorageManager:
             return
 
         print_info("Removing all unused images...")
-        run_command("docker image prune -a -f")
+        run_argv(["docker", "image", "prune", "-a", "-f"])
         print_success("Unused images removed")
 
     def remove_unused_volumes(self):
@@ -697,10 +1908,10 @@ class StorageManager:
         print_warning("Only volumes not mounted to ANY container (running or stopped) will be removed")
 
         print_info("\nListing all volumes...")
-        run_command("docker volume ls")
+        run_argv(["docker", "volume", "ls"])
 
         print_info("\nListing unused volumes (would be deleted)...")
-        run_command("docker volume ls -f dangling=true")
+        run_argv(["docker", "volume", "ls", "-f", "dangling=true"])
 
         if input("\nDo you understand this may cause data loss? (yes/no): ").lower() != 'yes':
             print_warning("Operation cancelled")
@@ -711,7 +1922,7 @@ class StorageManager:
             return
 
         print_info("Removing unused volumes...")
-        run_command("docker volume prune -f")
+        run_argv(["docker", "volume", "prune", "-f"])
         print_success("Unused volumes removed")
 
     def safe_docker_cleanup(self):
@@ -730,43 +1941,58 @@ class StorageManager:
             return
 
         print_info("Running safe Docker cleanup...")
-        run_command("docker container prune -f")
-        run_command("docker image prune -f")
-        run_command("docker network prune -f")
-        run_command("docker builder prune -a -f")
+
+        # Skip prunes for categories with no unused objects; networks are not
+        # reported by 'docker system df', so always prune those
+        reclaimable = docker_reclaimable()
+        prunes = [
+            ("Containers", ["docker", "container", "prune", "-f"]),
+            ("Images", ["docker", "image", "prune", "-f"]),
+            (None, ["docker", "network", "prune", "-f"]),
+            ("Build Cache", ["docker", "builder", "prune", "-a", "-f"]),
+        ]
+        needed = [
+            argv for category, argv in prunes
+            if category is None or reclaimable is None or reclaimable.get(category, True)
+        ]
+
+        # The prunes touch independent object types, so run them side by side
+        with ThreadPoolExecutor(max_workers=len(needed)) as executor:
+            results = list(executor.map(lambda argv: run_argv(argv, capture=True), needed))
+
+        for argv, (code, output) in zip(needed, results):
+            if output.strip():
+                print(output.rstrip())
+            if code != 0:
+                print_error(f"'{' '.join(argv)}' failed")
+        if len(needed) < len(prunes):
+            print_info(f"Skipped {len(prunes) - len(needed)} prune(s) with nothing to reclaim")
 
         print_success("Safe Docker cleanup completed!")
         print_info("\nDocker storage after cleanup:")
-        run_command("docker system df")
+        run_argv(["docker", "system", "df"])
 
     def advanced_analysis_menu(self):
         """Advanced analysis submenu"""
+        dispatch = {
+            "1": self.find_largest_files,
+            "2": self.find_largest_dirs,
+            "3": self.find_old_files,
+            "4": self.analyze_file_types,
+            "5": self.find_duplicate_files,
+            "6": self.analyze_directory_growth,
+        }
+
         while True:
             print_header("Advanced Analysis")
 
-            print(f"{Colors.BOLD}Advanced Options:{Colors.ENDC}")
-            print(f"{Colors.CYAN}1.{Colors.ENDC} Find largest files in system")
-            print(f"{Colors.CYAN}2.{Colors.ENDC} Find largest directories in specific path")
-            print(f"{Colors.CYAN}3.{Colors.ENDC} Find old files (not accessed in N days)")
-            print(f"{Colors.CYAN}4.{Colors.ENDC} Search for specific file types and their total size")
-            print(f"{Colors.CYAN}5.{Colors.ENDC} Check for duplicate files (by size)")
-            print(f"{Colors.CYAN}6.{Colors.ENDC} Analyze directory growth over time")
-            print(f"{Colors.RED}0.{Colors.ENDC} Back to main menu")
+            sys.stdout.write(_ANALYSIS_MENU)
 
             choice = input(f"\n{Colors.BOLD}Select an option:{Colors.ENDC} ").strip()
 
-            if choice == "1":
-                self.find_largest_files()
-            elif choice == "2":
-                self.find_largest_dirs()
-            elif choice == "3":
-                self.find_old_files()
-            elif choice == "4":
-                self.analyze_file_types()
-            elif choice == "5":
-                self.find_duplicate_files()
-            elif choice == "6":
-                self.analyze_directory_growth()
+            handler = dispatch.get(choice)
+            if handler:
+                handler()
             elif choice == "0":
                 break
             else:
@@ -783,23 +2009,72 @@ class StorageManager:
         path = input("Path to search (default: /): ").strip() or "/"
 
         print_warning("This may take several minutes...")
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
+        sudo = self._use_sudo(path)
+        path = os.path.expanduser(path)
+
+        try:
+            limit = int(count)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            print_error("Invalid count")
+            return
 
         print_info(f"Searching for {count} largest files in {path}...")
-        run_command(f"{sudo}find {path} -type f -exec du -h {{}} + 2>/dev/null | sort -rh | head -n {count}")
+        walker = _walk_top_files_parallel if _is_high_latency_fs(path) else _walk_top_files
+        largest, unreadable = walker(path, limit)
+
+        # Only hand the walk to a privileged find when we could not see everything
+        if unreadable and sudo:
+            print_info(f"{unreadable} directories were not readable, re-scanning with sudo...")
+            # %b is allocated 512-byte blocks, matching what the walker reports
+            blocks = stream_top_entries(_find_argv(path, "-xdev", "-type", "f", "-printf", "%b\t%p\n", sudo=True), limit)
+            largest = [(n_blocks * 512, file_path) for n_blocks, file_path in blocks]
+            unreadable = 0
+
+        for size, file_path in largest:
+            print(f"{format_size(size):>8}  {file_path}")
+
+        if unreadable:
+            print_warning(f"Skipped {unreadable} directories without read permission")
 
     def find_largest_dirs(self):
         """Find largest directories in specific path"""
         print_header("Find Largest Directories")
 
         path = input("Path to search (default: /): ").strip() or "/"
-        depth = input("Directory depth (default: 2): ").strip() or "2"
+        max_depth = prompt_depth("Directory depth (default: 2): ", 2)
         count = input("How many directories to show? (default: 20): ").strip() or "20"
 
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
+        sudo = self._use_sudo(path)
+        path = os.path.expanduser(path)
+
+        try:
+            limit = int(count)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            print_error("Invalid count")
+            return
+
+        if not os.path.isdir(path):
+            print_error(f"Not a directory: {path}")
+            return
 
         print_info(f"Finding largest directories in {path}...")
-        run_command(f"{sudo}du -h --max-depth={depth} {path} 2>/dev/null | sort -rh | head -n {count}")
+        walker = _parallel_dir_sizes if _is_high_latency_fs(path) else _dir_sizes_topk
+        largest, unreadable = walker(path, limit, max_depth)
+
+        if unreadable and sudo:
+            print_info(f"{unreadable} directories were not readable, re-scanning with sudo...")
+            largest = parallel_du_top(path, max_depth, limit, sudo=True)
+            unreadable = 0
+
+        for size, dir_path in largest:
+            print(f"{format_size(size):>8}  {dir_path}")
+
+        if unreadable:
+            print_warning(f"Skipped {unreadable} directories without read permission")
 
     def find_old_files(self):
         """Find files not accessed in N days"""
@@ -808,11 +2083,47 @@ class StorageManager:
         path = input("Path to search (default: /home): ").strip() or "/home"
         days = input("Not accessed in how many days? (default: 180): ").strip() or "180"
 
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
+        sudo = self._use_sudo(path)
+        path = os.path.expanduser(path)
+        if not os.path.isdir(path):
+            print_error(f"Not a directory: {path}")
+            return
+        if not days.isdigit():
+            print_error("Invalid number of days")
+            return
 
         print_info(f"Finding files not accessed in {days} days in {path}...")
         print_warning("This may take a while...")
-        run_command(f"{sudo}find {path} -type f -atime +{days} -exec ls -lh {{}} \\; 2>/dev/null | head -50")
+        argv = _find_argv(path, "-type", "f", "-atime", f"+{days}", "-printf", "%s\t%AF  %p\n",
+                          sudo=sudo, skip_pseudo=True)
+        try:
+            process = subprocess.Popen(
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                errors='replace'
+            )
+        except Exception as e:
+            print_error(f"Failed to run find: {e}")
+            return
+
+        with process:
+            try:
+                shown = 0
+                for line in process.stdout:
+                    item = _parse_size_line(line)
+                    if not item:
+                        continue
+                    print(f"{format_size(item[0]):>8}  {item[1]}")
+                    shown += 1
+                    if shown == 50:
+                        # Like head -50: stop the walk instead of letting it finish unseen
+                        process.terminate()
+                        break
+            except KeyboardInterrupt:
+                process.terminate()
+                raise
 
     def analyze_file_types(self):
         """Analyze file types and their total size"""
@@ -825,30 +2136,89 @@ class StorageManager:
             print_error("Extension is required")
             return
 
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
+        sudo = self._use_sudo(path)
         path = os.path.expanduser(path)
+        if not os.path.isdir(path):
+            print_error(f"Not a directory: {path}")
+            return
 
         print_info(f"Finding {extension} files in {path}...")
-        run_command(f"{sudo}find {path} -type f -name '*{extension}' -exec ls -lh {{}} \\; 2>/dev/null | head -50")
+        # One traversal both lists the first 50 matches and totals all of them
+        argv = _find_argv(path, "-type", "f", "-name", f"*{extension}", "-printf", "%s\t%TF %TH:%TM  %p\n",
+                          sudo=sudo, skip_pseudo=True)
+        total = matches = 0
+        try:
+            process = subprocess.Popen(
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                errors='replace'
+            )
+        except Exception as e:
+            print_error(f"Failed to run find: {e}")
+            return
 
-        print_info(f"\nTotal size of {extension} files:")
-        run_command(f"{sudo}find {path} -type f -name '*{extension}' -exec du -ch {{}} + 2>/dev/null | grep total$")
+        with process:
+            try:
+                for line in process.stdout:
+                    item = _parse_size_line(line)
+                    if not item:
+                        continue
+                    total += item[0]
+                    matches += 1
+                    if matches <= 50:
+                        print(f"{format_size(item[0]):>8}  {item[1]}")
+            except KeyboardInterrupt:
+                process.terminate()
+                raise
+
+        if matches > 50:
+            print_info(f"... and {matches - 50} more")
+        print_info(f"\nTotal size of {extension} files: {format_size(total)} in {matches} files")
 
     def find_duplicate_files(self):
-        """Find potential duplicate files by size"""
-        print_header("Find Duplicate Files (by size)")
+        """Find duplicate files by size, confirmed by content hash"""
+        print_header("Find Duplicate Files")
 
         path = input("Path to search (default: ~): ").strip() or "~"
         path = os.path.expanduser(path)
 
-        print_info("Finding files with duplicate sizes...")
-        print_warning("This only checks file size, not content")
+        if not os.path.isdir(path):
+            print_error(f"Not a directory: {path}")
+            return
+
+        print_info("Grouping files by size...")
         print_warning("This may take a while...")
 
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
+        sudo = False
+        unreadable: List[str] = []
+        walker = _walk_sizes_parallel if _is_high_latency_fs(path) else _walk_sizes
+        by_size = size_collisions(walker(path, unreadable))
+
+        if unreadable and self._use_sudo(path):
+            print_info(f"{len(unreadable)} directories were not readable, re-scanning with sudo...")
+            sudo = True
+            by_size = size_collisions(_find_sizes(path, sudo=True))
+        elif unreadable:
+            print_warning(f"Skipped {len(unreadable)} directories without read permission")
+
+        candidates = sum(len(paths) for paths in by_size.values())
+        print_info(f"Hashing {candidates} files that share a size with another file...")
 
-        # Find files, get their sizes, find duplicates
-        run_command(f"{sudo}find {path} -type f -exec du -b {{}} + 2>/dev/null | sort -n | uniq -d -w 15")
+        groups = hash_duplicates(by_size, sudo=sudo)
+        if not groups:
+            print_success("No duplicate files found")
+            return
+
+        wasted = 0
+        for size, paths in groups:
+            wasted += size * (len(paths) - 1)
+            print(f"\n{Colors.BOLD}{format_size(size)} x {len(paths)}{Colors.ENDC}")
+            for dup_path in paths:
+                print(f"  {dup_path}")
+
+        print_info(f"{len(groups)} sets of duplicates, {format_size(wasted)} reclaimable")
 
     def analyze_directory_growth(self):
         """Analyze directory size"""
@@ -856,10 +2226,16 @@ class StorageManager:
 
         path = input("Path to analyze (default: /var/log): ").strip() or "/var/log"
 
-        sudo = "sudo " if self.has_sudo and path.startswith("/") and path != os.path.expanduser("~") else ""
+        sudo = self._use_sudo(path)
+        path = os.path.expanduser(path)
+
+        if not os.path.isdir(path):
+            print_error(f"Not a directory: {path}")
+            return
 
         print_info(f"Analyzing {path}...")
-        run_command(f"{sudo}du -h --max-depth=2 {path} 2>/dev/null | sort -rh | head -30")
+        for size, dir_path in parallel_du_top(path, 2, 30, sudo=sudo):
+            print(f"{format_size(size):>8}  {dir_path}")
 
     def check_install_tools(self):
         """Check and install required tools"""
@@ -871,26 +2247,22 @@ class StorageManager:
             "dust": "Modern du alternative - Tree-style disk usage (requires snap)",
         }
 
+        optional_tools = ["docker", "npm", "pip", "pip3"]
+        # One PATH lookup per tool, shared by both tables (and cached across menu visits)
+        installed = {tool for tool in [*tools, *optional_tools] if check_tool_installed(tool)}
+
         print(f"{Colors.BOLD}Tool Status:{Colors.ENDC}\n")
 
         for tool, description in tools.items():
-            installed = check_tool_installed(tool)
-            status = f"{Colors.GREEN}✓ Installed{Colors.ENDC}" if installed else f"{Colors.RED}✗ Not installed{Colors.ENDC}"
+            status = f"{Colors.GREEN}✓ Installed{Colors.ENDC}" if tool in installed else f"{Colors.RED}✗ Not installed{Colors.ENDC}"
             print(f"{tool:15} {status:30} - {description}")
 
         print(f"\n{Colors.BOLD}Optional tools:{Colors.ENDC}")
-        optional_tools = ["docker", "npm", "pip", "pip3"]
         for tool in optional_tools:
-            installed = check_tool_installed(tool)
-            status = f"{Colors.GREEN}✓ Installed{Colors.ENDC}" if installed else f"{Colors.YELLOW}○ Not installed{Colors.ENDC}"
+            status = f"{Colors.GREEN}✓ Installed{Colors.ENDC}" if tool in installed else f"{Colors.YELLOW}○ Not installed{Colors.ENDC}"
             print(f"{tool:15} {status}")
 
-        print(f"\n{Colors.BOLD}Installation Options:{Colors.ENDC}")
-        print(f"{Colors.CYAN}1.{Colors.ENDC} Install ncdu (recommended)")
-        print(f"{Colors.CYAN}2.{Colors.ENDC} Install duf")
-        print(f"{Colors.CYAN}3.{Colors.ENDC} Install dust (via snap)")
-        print(f"{Colors.CYAN}4.{Colors.ENDC} Install all recommended tools")
-        print(f"{Colors.RED}0.{Colors.ENDC} Back to main menu")
+        sys.stdout.write(_INSTALL_MENU)
 
         choice = input(f"\n{Colors.BOLD}Select an option:{Colors.ENDC} ").strip()
 
@@ -906,17 +2278,45 @@ class StorageManager:
                 print_error("Failed to install duf")
         elif choice == "3":
             print_info("Installing dust via snap...")
-            code, _ = run_command("sudo snap install dust")
+            code, _ = run_argv(["sudo", "snap", "install", "dust"])
+            check_tool_installed.cache_clear()
             if code == 0:
                 print_success("dust installed successfully!")
             else:
                 print_error("Failed to install dust")
         elif choice == "4":
             print_info("Installing all recommended tools...")
-            install_tool("ncdu")
-            install_tool("duf")
-            run_command("sudo snap install dust")
-            print_success("Installation complete!")
+            # Ask for the sudo password once, before two installers share the terminal
+            run_argv(["sudo", "-v"])
+            # snap doesn't take apt's dpkg lock, so dust downloads while apt runs
+            # Its stderr is held back so it can't interleave with apt's output
+            try:
+                snap = subprocess.Popen(
+                    ["sudo", "-n", "snap", "install", "dust"],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    errors='replace'
+                )
+            except Exception as e:
+                snap, snap_err = None, str(e)
+            apt_ok = install_tools(["ncdu", "duf"])
+            if snap is not None:
+                print_info("Waiting for snap to finish installing dust...")
+                _, snap_err = snap.communicate()
+            snap_ok = snap is not None and snap.returncode == 0
+            check_tool_installed.cache_clear()
+
+            if apt_ok and snap_ok:
+                print_success("Installation complete!")
+            else:
+                if not apt_ok:
+                    print_error("Failed to install ncdu/duf")
+                if not snap_ok:
+                    if snap_err.strip():
+                        print_error(f"Failed to install dust: {snap_err.strip()}")
+                    else:
+                        print_error("Failed to install dust")
 
         if choice != "0":
             input("\nPress Enter to continue...")
@@ -925,46 +2325,8 @@ class StorageManager:
         """Show information about WSL disk compaction"""
         print_header("WSL Disk Compaction Information")
 
-        print(f"{Colors.BOLD}Why Compaction is Needed:{Colors.ENDC}")
-        print("WSL uses virtual disk files (VHDX) that grow as you use space but don't")
-        print("automatically shrink when you delete files. After cleanup, you must compact")
-        print("the VHDX to reclaim the space on Windows.\n")
-
-        print(f"{Colors.BOLD}Steps to Compact WSL Disks (Run in Windows PowerShell as Admin):{Colors.ENDC}\n")
-
-        print(f"{Colors.YELLOW}Method 1 - Modern WSL (WSL 2.0+):{Colors.ENDC}")
-        print("1. Shutdown all WSL instances:")
-        print("   wsl --shutdown\n")
-        print("2. Compact Ubuntu-22.04 disk:")
-        print("   wsl --manage Ubuntu-22.04 --set-sparse true\n")
-        print("3. Compact docker-desktop-data (if using Docker):")
-        print("   wsl --manage docker-desktop-data --set-sparse true\n")
-
-        print(f"{Colors.YELLOW}Method 2 - Diskpart (if Method 1 doesn't work):{Colors.ENDC}")
-        print("1. Shutdown WSL:")
-        print("   wsl --shutdown\n")
-        print("2. Open diskpart:")
-        print("   diskpart\n")
-        print("3. In diskpart, for Ubuntu:")
-        print('   select vdisk file="%LOCALAPPDATA%\\Packages\\CanonicalGroupLimited.Ubuntu22.04LTS_79rhkp1fndgsc\\LocalState\\ext4.vhdx"')
-        print("   compact vdisk")
-        print("   detach vdisk\n")
-        print("4. For Docker:")
-        print('   select vdisk file="%LOCALAPPDATA%\\Docker\\wsl\\data\\ext4.vhdx"')
-        print("   compact vdisk")
-        print("   detach vdisk\n")
-        print("5. Exit diskpart:")
-        print("   exit\n")
-
-        print(f"{Colors.YELLOW}Method 3 - Optimize-VHD (requires Hyper-V):{Colors.ENDC}")
-        print('optimize-vhd -Path "$env:LOCALAPPDATA\\Packages\\CanonicalGroupLimited.Ubuntu22.04LTS_79rhkp1fndgsc\\LocalState\\ext4.vhdx" -Mode Full\n')
-
-        print(f"{Colors.BOLD}Important Notes:{Colors.ENDC}")
-        print("• Always run 'wsl --shutdown' before compacting")
-        print("• Compaction can take several minutes")
-        print("• Make sure no WSL instances are running")
-        print("• The VHDX file paths may vary based on your installation")
-        print("• Backup important data before compacting")
+        sys.stdout.write(_WSL_COMPACTION_INFO)
+        sys.stdout.flush()
 
 def main():
     """Main entry point"""
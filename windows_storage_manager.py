@@ -9,7 +9,13 @@ import sys
 import subprocess
 import shutil
 import time
-from pathlib import Path
+import asyncio
+import atexit
+import base64
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Optional, List, Tuple, Dict, Set
 import platform
 import unicodedata
@@ -49,33 +55,110 @@ def print_info(text: str):
     """Print info message"""
     print(f"{Colors.CYAN}ℹ {text}{Colors.ENDC}")
 
+# Menu and help bodies never change, so build them once and emit each with a single write
+_MAIN_MENU = "\n".join([
+    f"\n{Colors.BOLD}Main Menu:{Colors.ENDC}",
+    f"{Colors.CYAN}1.{Colors.ENDC} Show WSL Distributions & Disk Usage",
+    f"{Colors.CYAN}2.{Colors.ENDC} Find & Show VHDX Files",
+    f"{Colors.CYAN}3.{Colors.ENDC} Shutdown WSL",
+    f"{Colors.CYAN}4.{Colors.ENDC} Compact WSL Disks (Modern Method)",
+    f"{Colors.CYAN}5.{Colors.ENDC} Compact Using Diskpart (Manual)",
+    f"{Colors.CYAN}6.{Colors.ENDC} Compact Using Optimize-VHD (Hyper-V)",
+    f"{Colors.CYAN}7.{Colors.ENDC} Quick Compact All (Recommended)",
+    f"{Colors.CYAN}8.{Colors.ENDC} Verify Compaction Results",
+    f"{Colors.CYAN}9.{Colors.ENDC} Troubleshooting & Help",
+    f"{Colors.RED}0.{Colors.ENDC} Exit",
+]) + "\n"
+
+_MENU_PROMPT = f"\n{Colors.BOLD}Select an option:{Colors.ENDC} "
+
+_TROUBLESHOOTING_TEXT = "\n".join([
+    f"{Colors.BOLD}Common Issues and Solutions:{Colors.ENDC}\n",
+    f"{Colors.CYAN}1. \"Not running as Administrator\"{Colors.ENDC}",
+    "   Solution: Close this program and re-run it as Administrator",
+    "   • Press Win+X → Select 'Terminal (Admin)' or 'PowerShell (Admin)'",
+    "   • Or right-click the script → 'Run as administrator'\n",
+    f"{Colors.CYAN}2. \"The parameter is incorrect\" (Modern method){Colors.ENDC}",
+    "   Solution: Your WSL version doesn't support the modern method",
+    "   • Use Option 5 (Diskpart method) instead",
+    "   • Or update WSL: Run 'wsl --update' in PowerShell\n",
+    f"{Colors.CYAN}3. \"Process cannot access the file\"{Colors.ENDC}",
+    "   Solution: WSL is still running or file is in use",
+    "   • Make sure all WSL/Ubuntu windows are closed",
+    "   • Run Option 3 (Shutdown WSL) first",
+    "   • Wait 30 seconds, then try again",
+    "   • If using Docker, quit Docker Desktop completely\n",
+    f"{Colors.CYAN}4. Compaction doesn't free much space{Colors.ENDC}",
+    "   Solution: Make sure you deleted files in WSL first!",
+    "   • Run the Linux storage manager in WSL first",
+    "   • Clean up files, Docker images, etc.",
+    "   • Run 'sudo fstrim -av' in WSL so freed blocks are released",
+    "     (Quick Compact All and Optimize-VHD do this for you)",
+    "   • Then come back and compact on Windows\n",
+    f"{Colors.CYAN}5. Can't find VHDX files{Colors.ENDC}",
+    "   Solution: Use Option 2 to locate them",
+    "   • Common locations:",
+    "     %LOCALAPPDATA%\\Packages\\*Ubuntu*\\LocalState\\ext4.vhdx",
+    "     %LOCALAPPDATA%\\Docker\\wsl\\data\\ext4.vhdx\n",
+    f"{Colors.CYAN}6. Optimize-VHD not found{Colors.ENDC}",
+    "   Solution: Hyper-V is not installed",
+    "   • Use Option 4 (Modern method) or Option 5 (Diskpart) instead",
+    "   • Or install Hyper-V feature (Windows Pro/Enterprise only)\n",
+    f"{Colors.BOLD}Recommended Workflow:{Colors.ENDC}",
+    "1. Clean up files in WSL using the Linux storage manager",
+    "2. Come to Windows and run Option 7 (Quick Compact All)",
+    "3. Run Option 8 (Verify) to confirm space was reclaimed",
+    "4. If modern method fails, use Option 5 (Diskpart) instead\n",
+    f"{Colors.BOLD}Need more help?{Colors.ENDC}",
+    "• Check README.md for detailed documentation",
+    "• WSL documentation: https://docs.microsoft.com/en-us/windows/wsl/",
+]) + "\n"
+
+@lru_cache(maxsize=None)
+def _encoded_troubleshooting_text(encoding: str, newline: str) -> bytes:
+    return _TROUBLESHOOTING_TEXT.replace("\n", newline).encode(encoding, errors='replace')
+
+# (lowercase path substring, label) pairs for naming VHDX files found by path,
+# most specific first; the first match wins
+VHDX_CLASSIFIERS = (
+    ("ubuntu22", "Ubuntu 22.04"),
+    ("ubuntu-22", "Ubuntu 22.04"),
+    ("ubuntu20", "Ubuntu 20.04"),
+    ("ubuntu-20", "Ubuntu 20.04"),
+    ("ubuntu", "Ubuntu"),
+    ("docker-desktop-data", "Docker Desktop Data"),
+    ("docker", "Docker"),
+)
+
 def _ps_escape_double_quotes(value: str) -> str:
     return value.replace('`', '``').replace('"', '`"')
 
+# wsl.exe writes UTF-16, which often reaches us with NULs and a BOM left in
+_WSL_STRIP = str.maketrans('', '', '\x00\ufeff')
+
+def _ps_single_quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
 def _strip_control_characters(value: str) -> str:
+    # Printable strings have no control/format characters; skip the per-char scan
+    if value.isprintable():
+        return value
     return "".join(ch for ch in value if not unicodedata.category(ch).startswith('C'))
 
 def _parse_wsl_quiet_list(output: str) -> List[str]:
     distros: List[str] = []
     for raw in output.splitlines():
-        cleaned = raw.replace('\x00', '').lstrip('\ufeff')
-        cleaned = _strip_control_characters(cleaned).strip()
+        cleaned = _strip_control_characters(raw.translate(_WSL_STRIP)).strip()
         if cleaned and cleaned.lower() != 'name':
             distros.append(cleaned)
 
     # De-duplicate while preserving order
-    seen = set()
-    unique: List[str] = []
-    for d in distros:
-        if d not in seen:
-            seen.add(d)
-            unique.append(d)
-    return unique
+    return list(dict.fromkeys(distros))
 
 def _parse_wsl_table_list(output: str) -> List[str]:
     distros: List[str] = []
     for raw in (output or "").splitlines():
-        cleaned = _strip_control_characters(raw.replace('\x00', '')).strip().lstrip('\ufeff')
+        cleaned = _strip_control_characters(raw.translate(_WSL_STRIP)).strip()
         if not cleaned:
             continue
         lower = cleaned.lower()
@@ -96,22 +179,33 @@ def _parse_wsl_table_list(output: str) -> List[str]:
         if name:
             distros.append(name)
 
-    seen = set()
-    unique: List[str] = []
-    for d in distros:
-        if d not in seen:
-            seen.add(d)
-            unique.append(d)
-    return unique
+    return list(dict.fromkeys(distros))
+
+def _last_line(output: str) -> str:
+    """Last non-blank line of command output, stripped"""
+    tail = (output or "").rstrip()
+    return tail.rsplit('\n', 1)[-1].strip() if tail else ""
+
+# Messages from wsl.exe builds that predate `wsl --manage`, most common first
+_UNSUPPORTED_MARKERS = (
+    "unknown option",
+    "unrecognized option",
+    "parameter is incorrect",
+    "invalid command line option",
+)
 
 def _is_wsl_manage_unsupported(output: str) -> bool:
     output_lower = (output or "").lower()
-    return (
-        "unknown option" in output_lower
-        or "unrecognized option" in output_lower
-        or "parameter is incorrect" in output_lower
-        or "invalid command line option" in output_lower
-    )
+    return any(marker in output_lower for marker in _UNSUPPORTED_MARKERS)
+
+def _count_registered_distros() -> Optional[int]:
+    """Number of distros under the Lxss registry key, or None if the key can't be read"""
+    try:
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Lxss") as key:
+            return winreg.QueryInfoKey(key)[0]
+    except (ImportError, OSError):
+        return None
 
 def _try_get_wsl_vhdx_path_from_registry(distro: str) -> Optional[str]:
     distro_arg = _ps_escape_double_quotes(distro)
@@ -131,13 +225,64 @@ Write-Output $vhdx
     if code != 0:
         return None
 
-    path = (output or "").strip().splitlines()[-1].strip() if (output or "").strip() else ""
+    path = _last_line(output)
     if not path:
         return None
     if not os.path.exists(path):
         return None
     return path
 
+def _parse_vhdx_listing(output: str) -> List[Tuple[str, str, int]]:
+    """Parse "<distro>|<path>|<bytes>" lines into (distro, path, size) tuples"""
+    found: List[Tuple[str, str, int]] = []
+    for line in (output or "").splitlines():
+        head, sep, size = line.strip().rpartition('|')
+        distro, sep2, path = head.partition('|')
+        if sep and sep2 and path and size.isdigit():
+            found.append((distro, path, int(size)))
+    return found
+
+def _enumerate_wsl_vhdx_from_registry() -> List[Tuple[str, str, int]]:
+    """
+    (distro, path, size) for the VHDX of every registered WSL distribution,
+    read from the Lxss registry key in one PowerShell call instead of walking
+    %LOCALAPPDATA%\\Packages
+    """
+    ps_script = """
+$ErrorActionPreference = 'SilentlyContinue'
+Get-ChildItem -Path 'HKCU:\\Software\\Microsoft\\Windows\\CurrentVersion\\Lxss' | ForEach-Object {
+    $item = Get-ItemProperty $_.PSPath
+    if (-not [string]::IsNullOrWhiteSpace($item.BasePath)) {
+        $base = $item.BasePath -replace '^\\\\\\?\\\\', ''
+        Get-ChildItem -LiteralPath $base -Filter *.vhdx | ForEach-Object {
+            "$($item.DistributionName)|$($_.FullName)|$($_.Length)"
+        }
+    }
+}
+"""
+    code, output = run_powershell(ps_script, capture=True)
+    return _parse_vhdx_listing(output)
+
+def _iter_vhdx(root: str):
+    """Yield (path, size) for every VHDX below root; unreadable directories are skipped"""
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from _iter_vhdx(entry.path)
+                    elif entry.name.lower().endswith('.vhdx'):
+                        # On Windows the size comes with the directory listing, no extra stat
+                        yield entry.path, entry.stat().st_size
+                except OSError:
+                    continue
+    except OSError:
+        return
+
+def _search_vhdx_files(roots: List[str]) -> List[Tuple[str, str, int]]:
+    """Every VHDX below roots as ("", path, size)"""
+    return [("", path, size) for root in roots for path, size in _iter_vhdx(root)]
+
 def _try_get_docker_desktop_vhdx_path() -> Optional[str]:
     localappdata = os.environ.get('LOCALAPPDATA', '')
     if not localappdata:
@@ -163,16 +308,7 @@ def _try_find_docker_desktop_vhdx_paths() -> List[str]:
     root = os.path.join(localappdata, 'Docker', 'wsl')
     if not os.path.exists(root):
         return []
-    found: List[str] = []
-    try:
-        for dirpath, _, filenames in os.walk(root):
-            for name in filenames:
-                if name.lower() == 'ext4.vhdx':
-                    path = os.path.join(dirpath, name)
-                    if os.path.exists(path):
-                        found.append(path)
-    except Exception:
-        return []
+    found = [path for path, _ in _iter_vhdx(root) if os.path.basename(path).lower() == 'ext4.vhdx']
 
     seen: Set[str] = set()
     unique: List[str] = []
@@ -182,16 +318,183 @@ def _try_find_docker_desktop_vhdx_paths() -> List[str]:
             unique.append(p)
     return unique
 
+def _set_sparse_distros(distros: List[str]) -> List[Tuple[int, str]]:
+    """
+    Run `wsl --manage <distro> --set-sparse true` for every distro in a single
+    PowerShell call, returning (exit code, output) per distro in input order
+    """
+    names = ", ".join(_ps_single_quote(d) for d in distros)
+    ps_script = f"""
+$env:WSL_UTF8 = '1'
+$names = @({names})
+for ($i = 0; $i -lt $names.Count; $i++) {{
+    $o = & wsl.exe --manage $names[$i] --set-sparse true 2>&1 | Out-String
+    $code = $LASTEXITCODE
+    $msg = (($o -replace "`0", '') -replace '\\s+', ' ').Trim()
+    "RESULT|$i|$code|$msg"
+}}
+"""
+    code, output = run_powershell(ps_script, capture=True, timeout_seconds=60 * max(1, len(distros)))
+    # Distros without a result line (PowerShell failed or timed out) get the overall result
+    results: List[Tuple[int, str]] = [(code or 1, output)] * len(distros)
+    for line in (output or "").splitlines():
+        if not line.startswith("RESULT|"):
+            continue
+        parts = line.rstrip("\r").split("|", 3)
+        if len(parts) == 4 and parts[1].isdigit() and int(parts[1]) < len(distros):
+            exit_code = parts[2].strip()
+            results[int(parts[1])] = (int(exit_code) if exit_code.lstrip('-').isdigit() else 1, parts[3])
+    return results
+
+# PowerShell 7 starts noticeably faster than Windows PowerShell 5.1; use it when installed
+POWERSHELL_EXE = shutil.which('pwsh') or shutil.which('powershell') or 'powershell'
+# Resolved once so each spawn skips the PATH search
+WSL_EXE = shutil.which('wsl') or 'wsl'
+DISKPART_EXE = shutil.which('diskpart') or 'diskpart'
+# Flags shared by every PowerShell process: no profile, banner or prompts, plain text output
+_PS_FLAGS = ['-NoProfile', '-NoLogo', '-NonInteractive', '-OutputFormat', 'Text']
+
+# A VHDX listing younger than this is reused by verify_compaction (seconds)
+VHDX_CACHE_TTL = 60
+
+_PS_DRIVE_TABLE = (
+    "Get-PSDrive -PSProvider FileSystem | Where-Object {$_.Used -ne $null} | Format-Table Name, "
+    "@{Label='Used(GB)';Expression={[math]::Round($_.Used/1GB,2)}}, "
+    "@{Label='Free(GB)';Expression={[math]::Round($_.Free/1GB,2)}}, "
+    "@{Label='Total(GB)';Expression={[math]::Round(($_.Used+$_.Free)/1GB,2)}} -AutoSize"
+)
+_DRIVES_MARKER = "===DRIVES==="
+
+class _PSHost:
+    """
+    A long-lived PowerShell process that runs captured commands fed over stdin, so
+    each call skips interpreter startup. Commands are sent base64-encoded on a
+    single line and their output is terminated by a per-host sentinel line
+    carrying the exit code.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+    _unavailable = False
+
+    def __init__(self):
+        self.sentinel = f"__PSHOST_END_{os.urandom(8).hex()}__"
+        self.lock = threading.Lock()
+        self.closed = False
+        self.process = subprocess.Popen(
+            [POWERSHELL_EXE] + _PS_FLAGS + ['-Command', '-'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
+        )
+        self.lines: queue.Queue = queue.Queue()
+        threading.Thread(target=self._read_output, daemon=True).start()
+        # Output (including errors) is collected per command and written together
+        # with the sentinel through Console.Out so the two can't be reordered.
+        # As with -Command, the exit code follows $? of the command's last
+        # pipeline (captured inside the script block), using LASTEXITCODE when
+        # that pipeline was a failing native command
+        self._send(
+            "[Console]::OutputEncoding = [Text.Encoding]::UTF8; "
+            "function __PSHostRun([string]$b64) { "
+            "$global:LASTEXITCODE = 0; $Error.Clear(); $global:__PSHostOk = $false; "
+            "$src = [Text.Encoding]::Unicode.GetString([Convert]::FromBase64String($b64)); "
+            "$sb = [scriptblock]::Create($src + [Environment]::NewLine + '$global:__PSHostOk = $?'); "
+            "try { $text = & $sb 2>&1 | Out-String -Width 4096 } catch { $global:__PSHostOk = $false; $text = $_ | Out-String -Width 4096 }; "
+            "$code = if ($global:__PSHostOk) { 0 } elseif ($global:LASTEXITCODE) { $global:LASTEXITCODE } else { 1 }; "
+            f"[Console]::Out.Write($text); [Console]::Out.WriteLine('{self.sentinel} ' + $code); [Console]::Out.Flush() }}"
+        )
+
+    @classmethod
+    def shared(cls):
+        """The process-wide host, started on first use (None if PowerShell can't be started)"""
+        with cls._shared_lock:
+            if cls._shared is not None and (cls._shared.closed or cls._shared.process.poll() is not None):
+                cls._shared = None
+            if cls._shared is None and not cls._unavailable:
+                try:
+                    cls._shared = cls()
+                except Exception:
+                    cls._unavailable = True
+            return cls._shared
+
+    def _read_output(self):
+        for line in self.process.stdout:
+            self.lines.put(line)
+        self.lines.put(None)
+
+    def _send(self, line: str):
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+
+    def run(self, command: str, timeout_seconds: Optional[int] = None) -> Tuple[int, str]:
+        encoded = base64.b64encode(command.encode('utf-16-le')).decode('ascii')
+        self._send(f"__PSHostRun '{encoded}'")
+        deadline = time.time() + timeout_seconds if timeout_seconds else None
+        output: List[str] = []
+        while True:
+            # Poll so a host that dies without closing its output is noticed
+            try:
+                line = self.lines.get(timeout=0.5)
+            except queue.Empty:
+                if deadline and time.time() >= deadline:
+                    # A stuck command would block every later call; drop this host
+                    self.close()
+                    return 124, f"Command timed out after {timeout_seconds}s: {command}"
+                if self.process.poll() is not None:
+                    self.closed = True
+                    return 1, "".join(output) or "PowerShell host exited unexpectedly"
+                continue
+            if line is None:
+                self.closed = True
+                return 1, "".join(output) or "PowerShell host exited unexpectedly"
+            if line.startswith(self.sentinel):
+                code = line[len(self.sentinel):].strip()
+                return (int(code) if code.lstrip('-').isdigit() else 1), "".join(output)
+            output.append(line)
+
+    def close(self):
+        self.closed = True
+        try:
+            self.process.kill()
+        except Exception:
+            pass
+
+@atexit.register
+def _close_shared_ps_host():
+    if _PSHost._shared is not None:
+        _PSHost._shared.close()
+
+# Scripts that call exit would end the shared host, so they get their own process
+_PS_EXIT_PATTERN = re.compile(r"\bexit\b", re.IGNORECASE)
+
 def run_powershell(command: str, capture: bool = True, check: bool = False, timeout_seconds: Optional[int] = None) -> Tuple[int, str]:
     """
     Run a PowerShell command and return exit code and output
     """
+    if capture and not check and not _PS_EXIT_PATTERN.search(command):
+        # Reuse the shared host when it is idle; concurrent callers spawn their own
+        host = _PSHost.shared()
+        if host is not None and host.lock.acquire(blocking=False):
+            try:
+                return host.run(command, timeout_seconds)
+            except OSError:
+                pass  # the host went away mid-call; fall back to a fresh process
+            finally:
+                host.lock.release()
+
     try:
-        ps_command = ['powershell', '-NoProfile', '-Command', command]
+        ps_command = [POWERSHELL_EXE] + _PS_FLAGS + ['-Command', command]
 
+        # stdin is closed so PowerShell doesn't set up a reader for it
         if capture:
             result = subprocess.run(
                 ps_command,
+                stdin=subprocess.DEVNULL,
                 capture_output=True,
                 text=True,
                 check=check,
@@ -201,7 +504,7 @@ def run_powershell(command: str, capture: bool = True, check: bool = False, time
             )
             return result.returncode, result.stdout + result.stderr
         else:
-            result = subprocess.run(ps_command, check=check, timeout=timeout_seconds)
+            result = subprocess.run(ps_command, stdin=subprocess.DEVNULL, check=check, timeout=timeout_seconds)
             return result.returncode, ""
     except subprocess.TimeoutExpired as e:
         return 124, f"Command timed out after {timeout_seconds}s: {command}"
@@ -210,12 +513,48 @@ def run_powershell(command: str, capture: bool = True, check: bool = False, time
     except Exception as e:
         return 1, str(e)
 
-def run_wsl_command(command: str, capture: bool = True) -> Tuple[int, str]:
-    """Run a WSL command"""
+async def run_powershell_async(command: str) -> Tuple[int, str]:
+    """
+    Run a one-shot PowerShell command without blocking the event loop and
+    return exit code and output
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            POWERSHELL_EXE, *_PS_FLAGS, '-Command', command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+    except Exception as e:
+        return 1, str(e)
+    output = (stdout + stderr).decode('utf-8', errors='replace').replace('\r\n', '\n')
+    return process.returncode, output
+
+async def run_wsl_command_async(argv: List[str], distro: Optional[str] = None) -> Tuple[int, str]:
+    """
+    Run a command inside a WSL distribution (the default one unless distro is
+    given) without blocking the event loop and return exit code and output
+    """
+    distro_args = ['-d', distro] if distro else []
+    try:
+        process = await asyncio.create_subprocess_exec(
+            WSL_EXE, *distro_args, '--', *argv,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+    except Exception as e:
+        return 1, str(e)
+    return process.returncode, (stdout + stderr).decode('utf-8', errors='replace')
+
+def run_wsl_command(argv: List[str], capture: bool = True) -> Tuple[int, str]:
+    """Run a command inside the default WSL distribution (argv is passed through unsplit)"""
     try:
         if capture:
             result = subprocess.run(
-                ['wsl', '--'] + command.split(),
+                [WSL_EXE, '--'] + list(argv),
                 capture_output=True,
                 text=True,
                 check=False,
@@ -224,50 +563,194 @@ def run_wsl_command(command: str, capture: bool = True) -> Tuple[int, str]:
             )
             return result.returncode, result.stdout + result.stderr
         else:
-            result = subprocess.run(['wsl', '--'] + command.split(), check=False)
+            result = subprocess.run([WSL_EXE, '--'] + list(argv), check=False)
             return result.returncode, ""
     except Exception as e:
         return 1, str(e)
 
+@lru_cache(maxsize=1)
 def check_windows() -> bool:
     """Check if running on Windows"""
     return platform.system() == 'Windows'
 
+@lru_cache(maxsize=1)
 def check_admin() -> bool:
     """Check if running as administrator"""
+    if not check_windows():
+        return False
     try:
-        code, output = run_powershell(
-            '([Security.Principal.WindowsPrincipal][Security.Principal.WindowsIdentity]::GetCurrent()).IsInRole([Security.Principal.WindowsBuiltInRole]::Administrator)',
-            capture=True
-        )
-        return code == 0 and 'True' in output
+        import ctypes
+        return bool(ctypes.windll.shell32.IsUserAnAdmin())
     except:
         return False
 
-def get_file_size_gb(path: str) -> float:
-    """Get file size in GB"""
+ERROR_SHARING_VIOLATION = 32
+ERROR_NOT_SUPPORTED = 50
+# virtdisk.dll constants (virtdisk.h)
+VIRTUAL_DISK_ACCESS_METADATA_OPS = 0x00200000
+COMPACT_VIRTUAL_DISK_FLAG_NO_ZERO_SCAN = 0x00000001
+
+@lru_cache(maxsize=1)
+def _virtdisk_available() -> bool:
+    """Whether virtdisk.dll (Windows 7+) can be loaded"""
+    if not check_windows():
+        return False
     try:
-        size_bytes = os.path.getsize(path)
-        return size_bytes / (1024 ** 3)
+        import ctypes
+        ctypes.WinDLL("virtdisk.dll")
+        return True
+    except (ImportError, OSError):
+        return False
+
+def _compact_with_virtdisk(path: str, zero_scan: bool = True) -> Tuple[int, str]:
+    """
+    Compact a detached VHDX in-process with virtdisk.dll's CompactVirtualDisk.
+    Returns (Win32 error code, message); ERROR_NOT_SUPPORTED when the API can't be used.
+    """
+    if not check_windows():
+        return ERROR_NOT_SUPPORTED, "virtdisk.dll is only available on Windows"
+    try:
+        import ctypes
+        from ctypes import wintypes
+        virtdisk = ctypes.WinDLL("virtdisk.dll")
+        kernel32 = ctypes.WinDLL("kernel32.dll")
+    except (ImportError, OSError) as e:
+        return ERROR_NOT_SUPPORTED, str(e)
+
+    class VirtualStorageType(ctypes.Structure):
+        _fields_ = [("DeviceId", wintypes.ULONG), ("VendorId", ctypes.c_byte * 16)]
+
+    virtdisk.OpenVirtualDisk.argtypes = [
+        ctypes.POINTER(VirtualStorageType), wintypes.LPCWSTR, wintypes.DWORD,
+        wintypes.DWORD, ctypes.c_void_p, ctypes.POINTER(wintypes.HANDLE),
+    ]
+    virtdisk.OpenVirtualDisk.restype = wintypes.DWORD
+    virtdisk.CompactVirtualDisk.argtypes = [wintypes.HANDLE, wintypes.DWORD, ctypes.c_void_p, ctypes.c_void_p]
+    virtdisk.CompactVirtualDisk.restype = wintypes.DWORD
+
+    # A zeroed storage type lets virtdisk detect the format from the file
+    storage_type = VirtualStorageType()
+    handle = wintypes.HANDLE()
+    err = virtdisk.OpenVirtualDisk(
+        ctypes.byref(storage_type), path, VIRTUAL_DISK_ACCESS_METADATA_OPS, 0, None, ctypes.byref(handle)
+    )
+    if err:
+        return err, ctypes.FormatError(err)
+    try:
+        flags = 0 if zero_scan else COMPACT_VIRTUAL_DISK_FLAG_NO_ZERO_SCAN
+        err = virtdisk.CompactVirtualDisk(handle, flags, None, None)
+    finally:
+        kernel32.CloseHandle(handle)
+    return err, (ctypes.FormatError(err) if err else "")
+
+def _optimize_vhd_script(path: str, mode: str, shutdown_first: bool = False) -> str:
+    """Optimize-VHD call that prints the compacted file size on success"""
+    prefix = ""
+    if shutdown_first:
+        # wsl's exit code and any errors it left must not count as the optimize result
+        prefix = "wsl --shutdown | Out-Null; Start-Sleep -Seconds 10; $global:LASTEXITCODE = 0; $Error.Clear(); "
+    return prefix + f'Optimize-VHD -Path "{path}" -Mode {mode} -ErrorAction Stop; (Get-Item -LiteralPath "{path}").Length'
+
+def _parse_optimize_vhd_result(code: int, output: str) -> Tuple[bool, str, Optional[int]]:
+    if code == 0:
+        last = _last_line(output)
+        return True, "", int(last) if last.isdigit() else None
+    return False, (output or "").strip(), None
+
+def _fstrim_distro(distro: str) -> Tuple[int, str]:
+    """
+    Run `fstrim -av` as root inside a distro so blocks freed by deleted files
+    are discarded and compaction can skip the zero-block scan
+    """
+    try:
+        result = subprocess.run(
+            [WSL_EXE, '-d', distro, '--user', 'root', 'fstrim', '-av'],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            timeout=300,
+            env=dict(os.environ, WSL_UTF8='1'),
+        )
+        return result.returncode, result.stdout + result.stderr
+    except subprocess.TimeoutExpired:
+        return 124, "fstrim timed out after 300s"
+    except Exception as e:
+        return 1, str(e)
+
+def get_file_size_mb(path: str) -> int:
+    """Get file size in whole MB"""
+    try:
+        return os.path.getsize(path) >> 20
     except:
-        return 0.0
+        return 0
+
+# (unit, bytes per unit), largest first
+SIZE_UNITS = (('PB', 1 << 50), ('TB', 1 << 40), ('GB', 1 << 30), ('MB', 1 << 20), ('KB', 1 << 10))
 
 def format_size(size_bytes: int) -> str:
     """Format bytes to human readable size"""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.2f} PB"
+    magnitude = abs(size_bytes)
+    for unit, scale in SIZE_UNITS:
+        if magnitude >= scale:
+            return f"{size_bytes / scale:.2f} {unit}"
+    return f"{size_bytes:.2f} B"
 
 class WindowsStorageManager:
     def __init__(self):
         self.is_admin = check_admin()
         self.wsl_distributions = []
         self.vhdx_files = {}
+        # Registered distros and Hyper-V availability don't change while the
+        # menu is open, so each is probed once per session
+        self._distros_cache: Optional[List[Tuple[str, str]]] = None
+        self._optimize_vhd_cache: Optional[bool] = None
+        self._optimize_vhd_lock = threading.Lock()
+        # When self.vhdx_files was last enumerated (0 = never)
+        self._vhdx_cache_time = 0.0
+        # Compaction needs admin rights; probe for Hyper-V while the menu is shown
+        # so the compaction options already know which method to use
+        if self.is_admin:
+            threading.Thread(target=self._is_optimize_vhd_available, daemon=True).start()
+
+    @property
+    def has_optimize_vhd(self) -> bool:
+        """Whether the Hyper-V Optimize-VHD cmdlet is available (probed once)"""
+        return self._is_optimize_vhd_available()
+
+    def _get_distros(self) -> Optional[List[Tuple[str, str]]]:
+        """
+        Registered WSL distributions (cached) as (name, name escaped for a
+        double-quoted PowerShell argument) pairs, or None if wsl could not be queried
+        """
+        if self._distros_cache is None:
+            code, output = run_powershell("wsl --list --quiet", capture=True)
+            if code != 0:
+                return None
+            distros = _parse_wsl_quiet_list(output)
+            if not distros:
+                code2, output2 = run_powershell("wsl --list --verbose", capture=True)
+                if code2 == 0:
+                    distros = _parse_wsl_table_list(output2)
+            names = [d.strip() for d in distros if d and d.strip()]
+            self._distros_cache = [(name, _ps_escape_double_quotes(name)) for name in names]
+        return self._distros_cache
 
     def show_main_menu(self):
         """Display the main menu"""
+        dispatch = {
+            "1": self.show_wsl_distributions,
+            "2": self.find_and_show_vhdx_files,
+            "3": self.shutdown_wsl,
+            "4": self.compact_modern_method,
+            "5": self.compact_diskpart_method,
+            "6": self.compact_optimize_vhd,
+            "7": self.quick_compact_all,
+            "8": self.verify_compaction,
+            "9": self.show_troubleshooting,
+        }
+
         while True:
             print_header("Windows WSL Storage Manager")
 
@@ -278,38 +761,13 @@ class WindowsStorageManager:
                 print_error("NOT running as Administrator - Some features unavailable")
                 print_warning("Please run as Administrator for full functionality")
 
-            print(f"\n{Colors.BOLD}Main Menu:{Colors.ENDC}")
-            print(f"{Colors.CYAN}1.{Colors.ENDC} Show WSL Distributions & Disk Usage")
-            print(f"{Colors.CYAN}2.{Colors.ENDC} Find & Show VHDX Files")
-            print(f"{Colors.CYAN}3.{Colors.ENDC} Shutdown WSL")
-            print(f"{Colors.CYAN}4.{Colors.ENDC} Compact WSL Disks (Modern Method)")
-            print(f"{Colors.CYAN}5.{Colors.ENDC} Compact Using Diskpart (Manual)")
-            print(f"{Colors.CYAN}6.{Colors.ENDC} Compact Using Optimize-VHD (Hyper-V)")
-            print(f"{Colors.CYAN}7.{Colors.ENDC} Quick Compact All (Recommended)")
-            print(f"{Colors.CYAN}8.{Colors.ENDC} Verify Compaction Results")
-            print(f"{Colors.CYAN}9.{Colors.ENDC} Troubleshooting & Help")
-            print(f"{Colors.RED}0.{Colors.ENDC} Exit")
-
-            choice = input(f"\n{Colors.BOLD}Select an option:{Colors.ENDC} ").strip()
-
-            if choice == "1":
-                self.show_wsl_distributions()
-            elif choice == "2":
-                self.find_and_show_vhdx_files()
-            elif choice == "3":
-                self.shutdown_wsl()
-            elif choice == "4":
-                self.compact_modern_method()
-            elif choice == "5":
-                self.compact_diskpart_method()
-            elif choice == "6":
-                self.compact_optimize_vhd()
-            elif choice == "7":
-                self.quick_compact_all()
-            elif choice == "8":
-                self.verify_compaction()
-            elif choice == "9":
-                self.show_troubleshooting()
+            sys.stdout.write(_MAIN_MENU)
+
+            choice = input(_MENU_PROMPT).strip()
+
+            handler = dispatch.get(choice)
+            if handler:
+                handler()
             elif choice == "0":
                 print_info("Exiting Windows Storage Manager. Goodbye!")
                 sys.exit(0)
@@ -336,95 +794,127 @@ class WindowsStorageManager:
 
         # Get disk usage for each distribution
         print(f"\n{Colors.BOLD}Disk Usage in Distributions:{Colors.ENDC}")
-        code, output = run_powershell("wsl --list --quiet", capture=True)
+        distros = self._get_distros()
+
+        if distros:
+            # Each query is a distro cold start; run them side by side
+            usages = asyncio.run(self._gather_disk_usage([distro for distro, _ in distros]))
+            for (distro, _), (code, usage) in zip(distros, usages):
+                print(f"\n{Colors.CYAN}{distro}:{Colors.ENDC}")
+                if code == 0:
+                    print(usage)
+                else:
+                    print_warning(f"Could not get disk usage for {distro}")
 
-        if code == 0:
-            distros = _parse_wsl_quiet_list(output)
-            for distro in distros:
-                if distro:
-                    # Try to get disk usage from within the distro
-                    print(f"\n{Colors.CYAN}{distro}:{Colors.ENDC}")
-                    distro_arg = _ps_escape_double_quotes(distro)
-                    code, usage = run_powershell(f"wsl -d \"{distro_arg}\" df -h /", capture=True)
-                    if code == 0:
-                        print(usage)
-                    else:
-                        print_warning(f"Could not get disk usage for {distro}")
+    async def _gather_disk_usage(self, distros: List[str]) -> List[Tuple[int, str]]:
+        """`df -h /` inside each distro, at most 8 at a time, results in input order"""
+        limit = asyncio.Semaphore(8)
+
+        async def disk_usage(distro: str) -> Tuple[int, str]:
+            # wsl is called directly; a PowerShell in between only adds its startup
+            async with limit:
+                return await run_wsl_command_async(['df', '-h', '/'], distro=distro)
+
+        return await asyncio.gather(*(disk_usage(distro) for distro in distros))
 
     def find_and_show_vhdx_files(self):
         """Find and display all VHDX files"""
         print_header("Finding VHDX Files")
 
-        print_info("Searching for VHDX files (this may take a minute)...")
+        if self.vhdx_files and time.time() - self._vhdx_cache_time < VHDX_CACHE_TTL:
+            # Found moments ago: skip the registry and Docker lookups, only refresh sizes
+            recent = []
+            for vhdx in self.vhdx_files.values():
+                try:
+                    recent.append(dict(vhdx, size=os.path.getsize(vhdx['path'])))
+                except OSError:
+                    continue
+            if recent:
+                print_info("Using VHDX locations found in the last minute...")
+                self._show_vhdx_files(recent)
+                return
 
-        localappdata = os.environ.get('LOCALAPPDATA', '')
-        if not localappdata:
-            print_error("Could not find LOCALAPPDATA directory")
-            return
+        print_info("Reading WSL registrations for VHDX locations...")
 
-        # Search for VHDX files
         vhdx_files = []
+        seen_paths: Set[str] = set()
+
+        def add_vhdx(distro: str, full_path: str, size: int):
+            key = os.path.normcase(full_path)
+            if key not in seen_paths:
+                seen_paths.add(key)
+                vhdx_files.append({
+                    'path': full_path,
+                    'size': size,
+                    'name': os.path.basename(full_path),
+                    'distro': distro,
+                })
+
+        # Registered distros point straight at their disk, wherever it lives
+        for distro, full_path, size in _enumerate_wsl_vhdx_from_registry():
+            add_vhdx(distro, full_path, size)
+
+        # Docker Desktop keeps its disks outside the Lxss registrations
+        for full_path in _try_find_docker_desktop_vhdx_paths():
+            try:
+                add_vhdx("", full_path, os.path.getsize(full_path))
+            except OSError:
+                pass
 
-        print_info(f"Searching in: {localappdata}")
-
-        # Common locations
-        search_paths = [
-            os.path.join(localappdata, 'Packages'),
-            os.path.join(localappdata, 'Docker'),
-        ]
-
-        for search_path in search_paths:
-            if os.path.exists(search_path):
-                for root, dirs, files in os.walk(search_path):
-                    for file in files:
-                        if file.lower().endswith('.vhdx'):
-                            full_path = os.path.join(root, file)
-                            try:
-                                size = os.path.getsize(full_path)
-                                vhdx_files.append({
-                                    'path': full_path,
-                                    'size': size,
-                                    'name': file
-                                })
-                            except:
-                                pass
+        localappdata = os.environ.get('LOCALAPPDATA', '')
+        if not vhdx_files and localappdata:
+            print_info(f"Searching in: {localappdata} (this may take a minute)...")
+
+            # Common locations
+            search_paths = [
+                os.path.join(localappdata, 'Packages'),
+                os.path.join(localappdata, 'Docker'),
+            ]
+            search_paths = [p for p in search_paths if os.path.exists(p)]
+            if search_paths:
+                for distro, full_path, size in _search_vhdx_files(search_paths):
+                    add_vhdx(distro, full_path, size)
 
         if not vhdx_files:
             print_warning("No VHDX files found")
             return
 
+        self._vhdx_cache_time = time.time()
+        self._show_vhdx_files(vhdx_files)
+
+    def _show_vhdx_files(self, vhdx_files: List[Dict]):
+        """Print VHDX files largest first and remember them as the current selection list"""
         # Sort by size (largest first)
         vhdx_files.sort(key=lambda x: x['size'], reverse=True)
 
-        print(f"\n{Colors.BOLD}Found {len(vhdx_files)} VHDX file(s):{Colors.ENDC}\n")
+        # Build the listing first and write it in one go; each print is a console write
+        buf = [f"\n{Colors.BOLD}Found {len(vhdx_files)} VHDX file(s):{Colors.ENDC}\n\n"]
 
         self.vhdx_files = {}
         for idx, vhdx in enumerate(vhdx_files, 1):
             size_str = format_size(vhdx['size'])
             size_gb = vhdx['size'] / (1024 ** 3)
 
-            # Try to identify the distribution
-            distro_name = "Unknown"
+            # Registered distros carry their name; otherwise guess from the path
+            distro_name = vhdx.get('distro')
             path = vhdx['path']
 
-            if 'Ubuntu' in path:
-                if 'Ubuntu22' in path or 'Ubuntu-22' in path:
-                    distro_name = "Ubuntu 22.04"
-                elif 'Ubuntu20' in path or 'Ubuntu-20' in path:
-                    distro_name = "Ubuntu 20.04"
-                else:
-                    distro_name = "Ubuntu"
-            elif 'docker-desktop-data' in path.lower():
-                distro_name = "Docker Desktop Data"
-            elif 'docker' in path.lower():
-                distro_name = "Docker"
+            if not distro_name:
+                path_lower = path.lower()
+                distro_name = next(
+                    (label for needle, label in VHDX_CLASSIFIERS if needle in path_lower),
+                    "Unknown",
+                )
 
-            print(f"{Colors.CYAN}{idx}. {distro_name}{Colors.ENDC}")
-            print(f"   Size: {Colors.BOLD}{size_str}{Colors.ENDC} ({size_gb:.2f} GB)")
-            print(f"   Path: {path}\n")
+            buf.append(f"{Colors.CYAN}{idx}. {distro_name}{Colors.ENDC}\n")
+            buf.append(f"   Size: {Colors.BOLD}{size_str}{Colors.ENDC} ({size_gb:.2f} GB)\n")
+            buf.append(f"   Path: {path}\n\n")
 
             self.vhdx_files[idx] = vhdx
 
+        sys.stdout.write("".join(buf))
+        sys.stdout.flush()
+
     def shutdown_wsl(self):
         """Shutdown all WSL instances"""
         print_header("Shutdown WSL")
@@ -456,19 +946,17 @@ class WindowsStorageManager:
         print_header("Compact WSL Disks (Modern Method)")
 
         # Get list of distributions
-        code, output = run_powershell("wsl --list --quiet", capture=True)
-        if code != 0:
+        distros = self._get_distros()
+        if distros is None:
             print_error("Failed to get WSL distributions")
             return
 
-        distros = _parse_wsl_quiet_list(output)
-
         if not distros:
             print_warning("No WSL distributions found")
             return
 
         print(f"{Colors.BOLD}Available distributions:{Colors.ENDC}")
-        for idx, distro in enumerate(distros, 1):
+        for idx, (distro, _) in enumerate(distros, 1):
             print(f"{idx}. {distro}")
 
         print(f"\n{Colors.BOLD}Options:{Colors.ENDC}")
@@ -509,11 +997,9 @@ class WindowsStorageManager:
 
         print(f"\n{Colors.BOLD}Compacting distributions...{Colors.ENDC}\n")
 
-        for distro in distributions_to_compact:
+        for distro, distro_arg in distributions_to_compact:
             print(f"{Colors.CYAN}Compacting: {distro}{Colors.ENDC}")
 
-            distro_arg = _ps_escape_double_quotes(distro)
-
             code, output = run_powershell(
                 f"wsl --manage \"{distro_arg}\" --set-sparse true",
                 capture=True,
@@ -524,8 +1010,7 @@ class WindowsStorageManager:
                 print_success(f"Successfully compacted {distro}")
             else:
                 output_str = (output or "").strip()
-                output_lower = output_str.lower()
-                if "parameter is incorrect" in output_lower or "unknown option" in output_lower:
+                if _is_wsl_manage_unsupported(output_str):
                     print_warning(f"Modern method not supported for {distro}")
                     print_info("Try using Diskpart method (Option 5) instead")
                 else:
@@ -622,20 +1107,60 @@ class WindowsStorageManager:
             print()
 
     def _is_optimize_vhd_available(self) -> bool:
-        code, output = run_powershell(
-            "Get-Command Optimize-VHD -ErrorAction SilentlyContinue | Select-Object -First 1",
-            capture=True,
-        )
-        return code == 0 and bool((output or "").strip())
-
-    def _compact_vhdx_optimize_vhd(self, path: str) -> Tuple[bool, str]:
-        code, output = run_powershell(
-            f'Optimize-VHD -Path "{path}" -Mode Full',
-            capture=True,
-        )
+        # The startup probe may still be running; wait for it rather than probing twice
+        with self._optimize_vhd_lock:
+            if self._optimize_vhd_cache is None:
+                code, output = run_powershell(
+                    "Get-Command Optimize-VHD -ErrorAction SilentlyContinue | Select-Object -First 1",
+                    capture=True,
+                )
+                self._optimize_vhd_cache = code == 0 and bool((output or "").strip())
+            return self._optimize_vhd_cache
+
+    def _compact_vhdx_optimize_vhd(self, path: str, mode: str = "Full", shutdown_first: bool = False) -> Tuple[bool, str, Optional[int]]:
+        """
+        Run Optimize-VHD (Quick skips the zero-block scan and is only worth it
+        after fstrim); on success also returns the compacted file size when reported.
+        With shutdown_first, WSL is shut down in the same PowerShell call.
+        """
+        code, output = run_powershell(_optimize_vhd_script(path, mode, shutdown_first), capture=True)
+        return _parse_optimize_vhd_result(code, output)
+
+    async def _optimize_vhdx_files_async(self, files: List[Dict], trimmed: Set[str]) -> List[Tuple[bool, str, Optional[int]]]:
+        """Optimize-VHD every file; files on different drives run side by side"""
+        drive_locks: Dict[str, asyncio.Lock] = {}
+
+        async def optimize(vhdx: Dict) -> Tuple[bool, str, Optional[int]]:
+            path = vhdx['path']
+            mode = "Quick" if vhdx.get('distro') in trimmed else "Full"
+            async with drive_locks.setdefault(os.path.splitdrive(path)[0].upper(), asyncio.Lock()):
+                code, output = await run_powershell_async(_optimize_vhd_script(path, mode))
+            return _parse_optimize_vhd_result(code, output)
+
+        return await asyncio.gather(*(optimize(vhdx) for vhdx in files))
+
+    def _compact_vhdx_virtdisk(self, path: str, zero_scan: bool = True) -> Optional[Tuple[bool, str]]:
+        """
+        Compact through the virtdisk API. Returns None when diskpart should be
+        used instead: the API is unsupported here, or the file is still held
+        (diskpart retries while WSL lets go of it).
+        """
+        if not _virtdisk_available():
+            return None
+        code, msg = _compact_with_virtdisk(path, zero_scan=zero_scan)
         if code == 0:
             return True, ""
-        return False, (output or "").strip()
+        if code in (ERROR_NOT_SUPPORTED, ERROR_SHARING_VIOLATION):
+            print_warning(f"virtdisk could not compact {path} ({msg.strip()}); falling back to diskpart")
+            return None
+        return False, f"virtdisk error {code}: {msg.strip()}"
+
+    def _compact_vhdx_native(self, path: str, zero_scan: bool = True) -> Tuple[bool, str]:
+        """Compact through the virtdisk API, falling back to diskpart when it can't be used"""
+        result = self._compact_vhdx_virtdisk(path, zero_scan)
+        if result is not None:
+            return result
+        return self._compact_vhdx_diskpart(path)
 
     def _compact_vhdx_diskpart(self, path: str) -> Tuple[bool, str]:
         diskpart_script = f"""select vdisk file=\"{path}\"
@@ -648,7 +1173,7 @@ exit
         for attempt in range(1, 4):
             try:
                 process = subprocess.Popen(
-                    ['diskpart'],
+                    [DISKPART_EXE],
                     stdin=subprocess.PIPE,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
@@ -678,6 +1203,67 @@ exit
                 return False, last_err
         return False, last_err
 
+    def _compact_vhdx_batch_diskpart(self, paths: List[str]) -> Dict[str, Tuple[bool, str]]:
+        """Compact several VHDX files in one diskpart session
+
+        Diskpart does not echo piped commands, so its output is split on the
+        DISKPART> prompts: each file takes five (rem marker plus four commands).
+        Files whose compact step is not reported as successful are left out of
+        the result so the caller can retry them one at a time.
+        """
+        script_lines = []
+        for path in paths:
+            script_lines.append(f"rem ===BEGIN {path}===")
+            script_lines.append(f"select vdisk file=\"{path}\"")
+            script_lines.append("attach vdisk readonly")
+            script_lines.append("compact vdisk")
+            script_lines.append("detach vdisk")
+        script_lines.append("exit")
+        try:
+            process = subprocess.Popen(
+                [DISKPART_EXE],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors='replace',
+            )
+            stdout, _ = process.communicate(input="\n".join(script_lines) + "\n", timeout=1800 * len(paths))
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return {}
+        except Exception:
+            return {}
+
+        # The first segment is the banner printed before the first prompt
+        segments = (stdout or "").split("DISKPART>")[1:]
+        results: Dict[str, Tuple[bool, str]] = {}
+        for idx, path in enumerate(paths):
+            steps = segments[idx * 5:idx * 5 + 5]
+            if len(steps) < 5:
+                break
+            if "successfully compacted" in steps[3].lower():
+                results[path] = (True, "")
+        return results
+
+    def _trim_distros(self, distros: List[str]) -> Set[str]:
+        """fstrim each distro before shutdown; returns the names that were trimmed"""
+        trimmed: Set[str] = set()
+        if not distros:
+            return trimmed
+        # Each distro trims its own disk, so the runs overlap; report in order
+        with ThreadPoolExecutor(max_workers=len(distros)) as executor:
+            results = list(executor.map(_fstrim_distro, distros))
+        for distro, (code, output) in zip(distros, results):
+            if code == 0:
+                trimmed.add(distro)
+                print_success(f"Trimmed free space in {distro}")
+            else:
+                # Docker's data distro has no shell, so this is expected there
+                print_warning(f"Could not trim {distro}; it will get a full compaction")
+        return trimmed
+
     def _wait_for_wsl_shutdown_complete(self, timeout_seconds: int = 60) -> bool:
         deadline = time.time() + max(1, timeout_seconds)
         while time.time() < deadline:
@@ -706,12 +1292,7 @@ exit
 
         print_info("Checking if Optimize-VHD is available (requires Hyper-V)...")
 
-        code, output = run_powershell(
-            "Get-Command Optimize-VHD -ErrorAction SilentlyContinue",
-            capture=True
-        )
-
-        if code != 0 or not output.strip():
+        if not self.has_optimize_vhd:
             print_error("Optimize-VHD cmdlet not found")
             print_warning("This requires Hyper-V to be installed")
             print_info("Install Hyper-V or use Diskpart method (Option 5) instead")
@@ -740,12 +1321,6 @@ exit
             print_warning("Compaction cancelled")
             return
 
-        # Shutdown WSL
-        print_info("\nShutting down WSL first...")
-        run_powershell("wsl --shutdown", capture=True)
-        print_info("Waiting 10 seconds...")
-        time.sleep(10)
-
         files_to_compact = []
 
         if choice == 'A':
@@ -762,23 +1337,40 @@ exit
                 print_error("Invalid input")
                 return
 
+        # Trimmed disks only need Optimize-VHD's quick mode
+        print_info("\nTrimming free space inside WSL first...")
+        trimmed = self._trim_distros([v['distro'] for v in files_to_compact if v.get('distro')])
+
+        results = None
+        if len(files_to_compact) > 1:
+            print_info("\nShutting down WSL first...")
+            run_powershell("wsl --shutdown", capture=True)
+            print_info("Waiting 10 seconds...")
+            time.sleep(10)
+            print_info(f"Running Optimize-VHD on {len(files_to_compact)} files (this may take several minutes)...")
+            results = asyncio.run(self._optimize_vhdx_files_async(files_to_compact, trimmed))
+        else:
+            # A single file: WSL is shut down by the Optimize-VHD call itself
+            print_info("\nWSL will be shut down (then 10 seconds wait) right before optimizing")
+
         print(f"\n{Colors.BOLD}Optimizing VHDX files...{Colors.ENDC}\n")
 
-        for vhdx in files_to_compact:
+        for idx, vhdx in enumerate(files_to_compact):
             path = vhdx['path']
             print(f"{Colors.CYAN}Optimizing: {vhdx['name']}{Colors.ENDC}")
             print(f"Size before: {format_size(vhdx['size'])}")
 
-            print_info("Running Optimize-VHD (this may take several minutes)...")
-
-            code, output = run_powershell(
-                f'Optimize-VHD -Path "{path}" -Mode Full',
-                capture=True
-            )
+            if results is not None:
+                ok, err, new_size = results[idx]
+            else:
+                print_info("Running Optimize-VHD (this may take several minutes)...")
+                mode = "Quick" if vhdx.get('distro') in trimmed else "Full"
+                ok, err, new_size = self._compact_vhdx_optimize_vhd(path, mode, shutdown_first=True)
 
-            if code == 0:
+            if ok:
                 try:
-                    new_size = os.path.getsize(path)
+                    if new_size is None:
+                        new_size = os.path.getsize(path)
                     old_size = vhdx['size']
                     saved = old_size - new_size
 
@@ -788,7 +1380,7 @@ exit
                 except:
                     print_success("Optimization completed!")
             else:
-                print_error(f"Optimize-VHD failed: {output}")
+                print_error(f"Optimize-VHD failed: {err}")
 
             print()
 
@@ -805,7 +1397,7 @@ exit
         print_info("This is the recommended option after cleaning up files in WSL")
         print()
         print(f"{Colors.BOLD}This will:{Colors.ENDC}")
-        print("  1. Shutdown all WSL instances")
+        print("  1. Trim free space in each distribution, then shutdown all WSL instances")
         print("  2. Compact all WSL distribution disks")
         print("  3. Compact Docker Desktop disk (if present)")
         print()
@@ -817,25 +1409,21 @@ exit
             return
 
         # Get distributions
-        code, output = run_powershell("wsl --list --quiet", capture=True)
-        if code != 0:
+        distros = self._get_distros()
+        if distros is None:
             print_error("Failed to get WSL distributions")
             return
 
-        distros = _parse_wsl_quiet_list(output)
-        if not distros:
-            code2, output2 = run_powershell("wsl --list --verbose", capture=True)
-            if code2 == 0:
-                distros = _parse_wsl_table_list(output2)
-
-        distros = [d for d in distros if d and d.strip()]
-
         if not distros:
             print_warning("No WSL distributions found")
             return
 
+        # Trim first so compaction only has to release already-discarded blocks
+        print_info("\nStep 1: Trimming free space inside each distribution...")
+        trimmed = self._trim_distros([distro for distro, _ in distros])
+
         # Shutdown WSL
-        print_info("\nStep 1: Shutting down WSL...")
+        print_info("Shutting down WSL...")
         run_powershell("wsl --shutdown", capture=True)
         print_info("Waiting for complete shutdown...")
         if not self._wait_for_wsl_shutdown_complete(timeout_seconds=60):
@@ -849,7 +1437,8 @@ exit
         failed_count = 0
 
         compacted_paths: Set[str] = set()
-        optimize_vhd_available = self._is_optimize_vhd_available()
+        pending_vhdx: List[Tuple[str, str]] = []
+        optimize_vhd_available = self.has_optimize_vhd
         allow_unsafe_sparse: Optional[bool] = None
         docker_vhdx_candidates = _try_find_docker_desktop_vhdx_paths()
 
@@ -857,23 +1446,31 @@ exit
             nonlocal optimize_vhd_available
             if vhdx_path in compacted_paths:
                 return True
-            before_size = get_file_size_gb(vhdx_path)
+            before_size = get_file_size_mb(vhdx_path)
+            after_bytes: Optional[int] = None
+            zero_scan = label not in trimmed
             if optimize_vhd_available:
-                ok, err = self._compact_vhdx_optimize_vhd(vhdx_path)
+                ok, err, after_bytes = self._compact_vhdx_optimize_vhd(vhdx_path, "Full" if zero_scan else "Quick")
                 err_lower = (err or "").lower()
                 if (not ok) and (
                     "hyper-v management tools could not access" in err_lower
                     or "hyper-v platform is not installed" in err_lower
                     or "wmi" in err_lower and "hyper-v" in err_lower
                 ):
-                    optimize_vhd_available = False
-                    ok, err = self._compact_vhdx_diskpart(vhdx_path)
+                    optimize_vhd_available = self._optimize_vhd_cache = False
+                    ok, err = self._compact_vhdx_native(vhdx_path, zero_scan)
             else:
-                ok, err = self._compact_vhdx_diskpart(vhdx_path)
+                ok, err = self._compact_vhdx_native(vhdx_path, zero_scan)
+            return report_compaction(label, vhdx_path, before_size, ok, err, after_bytes)
+
+        def report_compaction(label: str, vhdx_path: str, before_size: int, ok: bool, err: str, after_bytes: Optional[int] = None) -> bool:
             if ok:
                 compacted_paths.add(vhdx_path)
-                after_size = get_file_size_gb(vhdx_path)
-                saved = max(0.0, before_size - after_size)
+                if after_bytes is not None:
+                    after_size = after_bytes >> 20
+                else:
+                    after_size = get_file_size_mb(vhdx_path)
+                saved = max(0, before_size - after_size) / 1024
                 print_success(f"{label} compacted ({saved:.2f} GB saved)")
                 return True
             if err:
@@ -882,20 +1479,13 @@ exit
                 print_error(f"Failed to compact {label}")
             return False
 
-        for distro in distros:
-            distro = (distro or "").strip()
-            if not distro:
-                continue
+        # One PowerShell call enables sparse mode on every distro; results are
+        # then handled in order (prompts and fallbacks stay serial)
+        sparse_results = _set_sparse_distros([distro for distro, _ in distros])
 
+        for (distro, distro_arg), (code, output) in zip(distros, sparse_results):
             print(f"{Colors.CYAN}Compacting: {distro}{Colors.ENDC}")
 
-            distro_arg = _ps_escape_double_quotes(distro)
-
-            code, output = run_powershell(
-                f"wsl --manage \"{distro_arg}\" --set-sparse true",
-                capture=True
-            )
-
             if code == 0:
                 print_success(f"{distro} compacted successfully")
                 success_count += 1
@@ -956,10 +1546,7 @@ exit
                     failed_count += 1
                     continue
 
-                if compact_vhdx_path(distro, vhdx_path):
-                    success_count += 1
-                else:
-                    failed_count += 1
+                pending_vhdx.append((distro, vhdx_path))
 
         docker_data_vhdx = _try_get_docker_desktop_vhdx_path()
         docker_distro_vhdx = _try_get_docker_desktop_distro_vhdx_path()
@@ -981,21 +1568,56 @@ exit
 
         if docker_data_vhdx or docker_distro_vhdx or extra_docker_vhdx:
             print(f"\n{Colors.BOLD}Step 3: Compacting Docker Desktop disk...{Colors.ENDC}\n")
-            if docker_data_vhdx:
-                if compact_vhdx_path("Docker Desktop", docker_data_vhdx):
-                    success_count += 1
-                else:
-                    failed_count += 1
-            if docker_distro_vhdx:
-                if compact_vhdx_path("Docker Desktop", docker_distro_vhdx):
-                    success_count += 1
-                else:
-                    failed_count += 1
-            for p in extra_docker_vhdx:
-                if compact_vhdx_path("Docker Desktop", p):
-                    success_count += 1
-                else:
-                    failed_count += 1
+            for p in [docker_data_vhdx, docker_distro_vhdx] + extra_docker_vhdx:
+                if p:
+                    pending_vhdx.append(("Docker Desktop", p))
+
+        if pending_vhdx:
+            # Compaction is bound by disk I/O, so files on different drives are
+            # compacted concurrently while files sharing a drive take turns
+            drive_groups: Dict[str, List[Tuple[str, str]]] = {}
+            for label, p in pending_vhdx:
+                drive_groups.setdefault(os.path.splitdrive(p)[0].upper(), []).append((label, p))
+
+            def compact_drive(group: List[Tuple[str, str]]) -> List[bool]:
+                batch_paths = list(dict.fromkeys(p for _, p in group if p not in compacted_paths))
+                if optimize_vhd_available or len(batch_paths) < 2:
+                    return [compact_vhdx_path(label, p) for label, p in group]
+                # Without Optimize-VHD each file goes through virtdisk first; the
+                # ones it hands back share one diskpart session, and anything that
+                # session did not confirm is retried through diskpart on its own
+                before_sizes = {p: get_file_size_mb(p) for p in batch_paths}
+                labels = {p: label for label, p in reversed(group)}
+                done: Dict[str, Tuple[bool, str]] = {}
+                fallback: List[str] = []
+                for p in batch_paths:
+                    result = self._compact_vhdx_virtdisk(p, zero_scan=labels[p] not in trimmed)
+                    if result is None:
+                        fallback.append(p)
+                    else:
+                        done[p] = result
+                if len(fallback) > 1:
+                    done.update(self._compact_vhdx_batch_diskpart(fallback))
+                results = []
+                for label, p in group:
+                    if p in compacted_paths:
+                        results.append(True)
+                        continue
+                    if p not in done:
+                        done[p] = self._compact_vhdx_diskpart(p)
+                    ok, err = done[p]
+                    results.append(report_compaction(label, p, before_sizes[p], ok, err))
+                return results
+
+            print_info(f"Compacting {len(pending_vhdx)} VHDX file(s) (this may take several minutes)...")
+            with ThreadPoolExecutor(max_workers=min(3, len(drive_groups))) as executor:
+                futures = [executor.submit(compact_drive, group) for group in drive_groups.values()]
+                for future in as_completed(futures):
+                    for ok in future.result():
+                        if ok:
+                            success_count += 1
+                        else:
+                            failed_count += 1
 
         print(f"\n{Colors.BOLD}Compaction Summary:{Colors.ENDC}")
         print(f"  Successfully compacted: {success_count}")
@@ -1012,17 +1634,35 @@ exit
 
         print_info("Checking VHDX file sizes and disk space...")
 
-        # Find VHDX files
-        self.find_and_show_vhdx_files()
+        if self.vhdx_files and time.time() - self._vhdx_cache_time < VHDX_CACHE_TTL:
+            # The file list is recent; refresh sizes and read the drive table in one call
+            vhdx_files = list(self.vhdx_files.values())
+            paths = ", ".join(_ps_single_quote(v['path']) for v in vhdx_files)
+            code, output = run_powershell(
+                f"$paths = @({paths}); "
+                "for ($i = 0; $i -lt $paths.Count; $i++) { $f = Get-Item -LiteralPath $paths[$i] -ErrorAction Ignore; "
+                "if ($f) { \"$i|$($f.FullName)|$($f.Length)\" } }; "
+                f"'{_DRIVES_MARKER}'; {_PS_DRIVE_TABLE}",
+                capture=True
+            )
+            listing, _, drive_output = (output or "").partition(_DRIVES_MARKER)
+            refreshed = []
+            for idx, _, size in _parse_vhdx_listing(listing):
+                if idx.isdigit() and int(idx) < len(vhdx_files):
+                    refreshed.append(dict(vhdx_files[int(idx)], size=size))
+            if refreshed:
+                print_header("Finding VHDX Files")
+                self._show_vhdx_files(refreshed)
+            else:
+                self.find_and_show_vhdx_files()
+        else:
+            self.find_and_show_vhdx_files()
+            code, drive_output = run_powershell(_PS_DRIVE_TABLE, capture=True)
 
-        # Get Windows disk space
+        # Windows disk space
         print(f"\n{Colors.BOLD}Windows Disk Space:{Colors.ENDC}")
-        code, output = run_powershell(
-            "Get-PSDrive -PSProvider FileSystem | Where-Object {$_.Used -ne $null} | Format-Table Name, @{Label='Used(GB)';Expression={[math]::Round($_.Used/1GB,2)}}, @{Label='Free(GB)';Expression={[math]::Round($_.Free/1GB,2)}}, @{Label='Total(GB)';Expression={[math]::Round(($_.Used+$_.Free)/1GB,2)}} -AutoSize",
-            capture=True
-        )
-        if code == 0:
-            print(output)
+        if code == 0 and drive_output.strip():
+            print(drive_output.strip("\r\n"))
 
         print(f"\n{Colors.BOLD}Tips:{Colors.ENDC}")
         print("• Compare VHDX file sizes with what you expect after cleanup")
@@ -1032,52 +1672,56 @@ exit
     def show_troubleshooting(self):
         """Show troubleshooting information"""
         print_header("Troubleshooting & Help")
+        # The text is static: hand the pre-encoded bytes straight to the binary
+        # layer (still sys.stdout, so the Windows console gets it as Unicode)
+        binary = getattr(sys.stdout, 'buffer', None)
+        if binary is None:
+            sys.stdout.write(_TROUBLESHOOTING_TEXT)
+            sys.stdout.flush()
+            return
+        sys.stdout.flush()
+        binary.write(_encoded_troubleshooting_text(sys.stdout.encoding or 'utf-8', os.linesep))
+        binary.flush()
 
-        print(f"{Colors.BOLD}Common Issues and Solutions:{Colors.ENDC}\n")
-
-        print(f"{Colors.CYAN}1. \"Not running as Administrator\"{Colors.ENDC}")
-        print("   Solution: Close this program and re-run it as Administrator")
-        print("   • Press Win+X → Select 'Terminal (Admin)' or 'PowerShell (Admin)'")
-        print("   • Or right-click the script → 'Run as administrator'\n")
-
-        print(f"{Colors.CYAN}2. \"The parameter is incorrect\" (Modern method){Colors.ENDC}")
-        print("   Solution: Your WSL version doesn't support the modern method")
-        print("   • Use Option 5 (Diskpart method) instead")
-        print("   • Or update WSL: Run 'wsl --update' in PowerShell\n")
-
-        print(f"{Colors.CYAN}3. \"Process cannot access the file\"{Colors.ENDC}")
-        print("   Solution: WSL is still running or file is in use")
-        print("   • Make sure all WSL/Ubuntu windows are closed")
-        print("   • Run Option 3 (Shutdown WSL) first")
-        print("   • Wait 30 seconds, then try again")
-        print("   • If using Docker, quit Docker Desktop completely\n")
-
-        print(f"{Colors.CYAN}4. Compaction doesn't free much space{Colors.ENDC}")
-        print("   Solution: Make sure you deleted files in WSL first!")
-        print("   • Run the Linux storage manager in WSL first")
-        print("   • Clean up files, Docker images, etc.")
-        print("   • Then come back and compact on Windows\n")
-
-        print(f"{Colors.CYAN}5. Can't find VHDX files{Colors.ENDC}")
-        print("   Solution: Use Option 2 to locate them")
-        print("   • Common locations:")
-        print("     %LOCALAPPDATA%\\Packages\\*Ubuntu*\\LocalState\\ext4.vhdx")
-        print("     %LOCALAPPDATA%\\Docker\\wsl\\data\\ext4.vhdx\n")
-
-        print(f"{Colors.CYAN}6. Optimize-VHD not found{Colors.ENDC}")
-        print("   Solution: Hyper-V is not installed")
-        print("   • Use Option 4 (Modern method) or Option 5 (Diskpart) instead")
-        print("   • Or install Hyper-V feature (Windows Pro/Enterprise only)\n")
-
-        print(f"{Colors.BOLD}Recommended Workflow:{Colors.ENDC}")
-        print("1. Clean up files in WSL using the Linux storage manager")
-        print("2. Come to Windows and run Option 7 (Quick Compact All)")
-        print("3. Run Option 8 (Verify) to confirm space was reclaimed")
-        print("4. If modern method fails, use Option 5 (Diskpart) instead\n")
-
-        print(f"{Colors.BOLD}Need more help?{Colors.ENDC}")
-        print("• Check README.md for detailed documentation")
-        print("• WSL documentation: https://docs.microsoft.com/en-us/windows/wsl/")
+def _timed_input(prompt: str, timeout: int = 10, default: str = 'n') -> str:
+    """
+    input() that gives up after timeout seconds without a keypress and returns
+    default, so unattended runs don't hang (the timeout needs a Windows console)
+    """
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+    if msvcrt is None or not sys.stdin.isatty():
+        try:
+            return input(prompt)
+        except EOFError:
+            return default
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    chars: List[str] = []
+    deadline = time.time() + timeout
+    # Once the user starts typing, wait for Enter however long it takes
+    while chars or time.time() < deadline:
+        if not msvcrt.kbhit():
+            time.sleep(0.05)
+            continue
+        ch = msvcrt.getwche()
+        if ch in ('\r', '\n'):
+            sys.stdout.write('\n')
+            return ''.join(chars)
+        if ch == '\x03':
+            raise KeyboardInterrupt
+        if ch == '\b':
+            if chars:
+                chars.pop()
+                sys.stdout.write(' \b')
+                sys.stdout.flush()
+            continue
+        chars.append(ch)
+    sys.stdout.write(f"\nNo answer after {timeout}s, using '{default}'\n")
+    return default
 
 def main():
     """Main entry point"""
@@ -1089,6 +1733,10 @@ def main():
         print_info("Use storage_manager.py on Linux/WSL instead")
         sys.exit(1)
 
+    # Start the shared PowerShell host in the background; its startup overlaps
+    # with the banner and admin prompt, and the WSL check below runs on it
+    threading.Thread(target=_PSHost.shared, daemon=True).start()
+
     # Check admin status
     is_admin = check_admin()
 
@@ -1105,12 +1753,16 @@ def main():
         print("3. Navigate to this directory and run the script again")
         print()
 
-        if input("Continue anyway? (y/n): ").lower() != 'y':
+        if _timed_input("Continue anyway? (y/n): ").lower() != 'y':
             print_info("Please restart as Administrator for full functionality")
             sys.exit(0)
 
-    # Check WSL is installed
-    code, _ = run_powershell("wsl --list", capture=True)
+    # Check WSL is installed: an Lxss key means it has been set up; only ask
+    # wsl.exe when the key is missing
+    if _count_registered_distros() is None:
+        code, _ = run_powershell("wsl --list", capture=True)
+    else:
+        code = 0
     if code != 0:
         print_error("WSL does not appear to be installed or configured")
         print_info("Install WSL first: https://docs.microsoft.com/en-us/windows/wsl/install")
@@ -1123,6 +1775,7 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
+        _close_shared_ps_host()
         print(f"\n\n{Colors.YELLOW}Operation cancelled by user{Colors.ENDC}")
         sys.exit(0)
     except Exception as e: